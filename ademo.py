@@ -5,16 +5,16 @@
 # Use an API client like Insomnia or Postman to call '/api/date' or
 # 'api/stop'.
 
-import gc
 import json
 import time
 
 import uasyncio as asyncio
 
 from ahttpserver import HTTPResponse, HTTPServer, sendfile
+from ahttpserver.gcscheduler import GCScheduler
 from ahttpserver.sse import EventSource
 
-app = HTTPServer()
+app = HTTPServer(gcscheduler=GCScheduler())  # collects garbage in between requests
 
 
 @app.route("GET", "/")
@@ -42,7 +42,7 @@ async def favicon(reader, writer, request):
     await sendfile(writer, "favicon.ico")
 
 
-@app.route("GET", "/api/time")
+@app.route("GET", "/api/time", streaming=True)
 async def api_time(reader, writer, request):
     """ Setup a server sent event connection to the client updating the time every second """
     eventsource = await EventSource(reader, writer)
@@ -91,14 +91,6 @@ async def say_hello_task():
         await asyncio.sleep(60)
 
 
-async def free_memory_task():
-    """ Avoid memory fragmentation """
-    while True:
-        gc.collect()
-        gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
-        await asyncio.sleep(5)
-
-
 if __name__ == "__main__":
     try:
         def handle_exception(loop, context):
@@ -112,7 +104,6 @@ if __name__ == "__main__":
         loop.set_exception_handler(handle_exception)
 
         loop.create_task(say_hello_task())
-        loop.create_task(free_memory_task())
         loop.create_task(app.start())
 
         loop.run_forever()
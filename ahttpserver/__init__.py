@@ -2,5 +2,5 @@
 # Released under MIT license
 
 from .sendfile import sendfile
-from .server import HTTPServer
+from .server import CONNECTION_CLOSE, CONNECTION_KEEP_ALIVE, HTTPServer
 from .response import HTTPResponse
\ No newline at end of file
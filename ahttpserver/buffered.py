@@ -0,0 +1,68 @@
+# Write buffering for stream writers
+#
+# Every write() followed by drain() can become a TCP segment of its own. A
+# response written in many small parts (status line, header fields, body)
+# then takes several packets.
+# The server hands a BufferedWriter to the handler instead of the stream
+# writer. It gathers writes in a buffer which is handed to the stream writer
+# when:
+# - the next write does not fit anymore (larger data is written directly)
+# - flush() is awaited, do so when data must reach the client now (like an
+#   event on an event stream)
+# - the handler returns
+# drain() only waits for data which was already handed over, so it does not
+# split the response into small packets.
+# Buffers are reused for later connections. Other attributes are taken from
+# the wrapped stream writer.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+
+class BufferedWriter:
+
+    def __init__(self, size=1024):
+        """ :param int size: buffer size in bytes """
+        self.writer = None
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._length = 0
+        self._pending = False  # data handed to writer since last drain
+
+    def attach(self, writer):
+        """ Start buffering for stream writer, or stop if writer is None """
+        self.writer = writer
+        self._length = 0
+        self._pending = False
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        n = len(data)
+        if self._length + n > len(self._buffer):
+            self._hand_over()
+            if n >= len(self._buffer):
+                self.writer.write(data)
+                self._pending = True
+                return
+        self._buffer[self._length:self._length + n] = data
+        self._length += n
+
+    def _hand_over(self):
+        if self._length > 0:
+            self.writer.write(bytes(self._view[:self._length]))  # a copy, as the buffer is reused
+            self._length = 0
+            self._pending = True
+
+    async def drain(self):
+        if self._pending:
+            self._pending = False
+            await self.writer.drain()
+
+    async def flush(self):
+        """ Send what is in the buffer and wait until it has been sent """
+        self._hand_over()
+        await self.drain()
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
@@ -0,0 +1,420 @@
+# HTTP client with connection pooling, for calling other servers
+#
+# Usage:
+#
+#   from ahttpserver import HTTPServer
+#   from ahttpserver.client import Client, proxy
+#
+#   app = HTTPServer()
+#   client = Client(size=2, timeout=5)
+#
+#   @app.route("GET", "/api/all")
+#   async def api_all(reader, writer, request):
+#       response = await client.request("GET", "192.168.178.21", 80, "/api/date")
+#       data = await response.body()  # or: while chunk := await response.read(): ...
+#       ...
+#
+#   # forward GET /board1/api/date to http://192.168.178.21/api/date
+#   app.route("GET", "/board1/api/date")(proxy(client, "192.168.178.21", prefix="/board1"))
+#
+# request() sends an HTTP/1.1 request and returns a Response as soon as the
+# status line and header have been received. The body is read in parts with
+# read() (until it returns b"") or completely with body(). Content-Length,
+# chunked transfer-encoding and bodies which end when the connection closes
+# are supported. Once the body has been read the connection goes back to the
+# pool of its host, unless the server will close it. A response whose body is
+# not read completely must be closed with close() (or use 'async with').
+# Per host at most 'size' connections are open. A request waits for a free
+# one at most 'timeout' seconds, which is also the limit for connecting and
+# for every read. Connections which have been idle for more than 'idle'
+# seconds are closed. When a kept alive connection turns out to have been
+# closed by the server the request is sent once more on a new connection,
+# but only if the method is idempotent (so a POST is never sent twice).
+# A timeout raises asyncio.TimeoutError, a malformed response ClientError.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+try:
+    import uasyncio as asyncio
+except ImportError:  # CPython
+    import asyncio
+
+from .response import HTTPResponse
+from .server import read_header
+from .ticks import ticks_diff, ticks_ms
+
+# header fields which only apply to a single connection, and are not forwarded by proxy()
+_HOP_BY_HOP = (b"connection", b"keep-alive", b"proxy-connection", b"te", b"transfer-encoding", b"upgrade")
+
+# methods which may be sent again when a kept alive connection was closed by the server
+_IDEMPOTENT = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE")
+
+
+class ClientError(Exception):
+    pass
+
+
+def field(header, name):
+    """ Return the value of header field name (bytes), ignoring case, or None """
+    value = header.get(name)
+    if value is None:
+        name = name.lower()
+        for key in header:
+            if key.lower() == name:
+                return header[key]
+    return value
+
+
+class _Connection:
+
+    def __init__(self, pool, reader, writer):
+        self.pool = pool
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0  # sent on this connection
+        self.used = ticks_ms()  # when last returned to the pool
+
+
+class _Pool:
+    """ Connections to one host """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.idle = []
+        self.active = 0  # connections in use
+        self.event = asyncio.Event()  # set when a connection is returned
+
+
+class Response:
+
+    def __init__(self, client, connection, method, version, status, reason, header):
+        """ Response from the server, the body has not been read yet
+
+        :param str version: HTTP version of the response ("1.1")
+        :param int status: HTTP status code
+        :param str reason: reason phrase
+        :param dict header: response header fields, name and value are bytes
+        """
+        self.version = version
+        self.status = status
+        self.reason = reason
+        self.header = header
+        self._client = client
+        self._connection = connection
+        self._chunked = False
+        self._chunk_started = False
+        self._remaining = None  # bytes left in body (or current chunk), None if until close
+
+        connection_field = field(header, b"Connection")
+        self._reusable = version == "1.1" and (connection_field is None or connection_field.lower() != b"close")
+
+        length = field(header, b"Content-Length")
+        if method == "HEAD" or status in (204, 304) or status < 200:
+            self._remaining = 0
+        elif (field(header, b"Transfer-Encoding") or b"").lower() == b"chunked":
+            self._chunked = True
+            self._remaining = 0
+        elif length is not None:
+            try:
+                self._remaining = int(length)
+                if self._remaining < 0:
+                    raise ValueError
+            except ValueError:
+                raise ClientError(f"invalid Content-Length {length}")
+        else:
+            self._reusable = False
+
+        if self._remaining == 0 and not self._chunked:
+            self._finish()
+
+    async def read(self, size=512):
+        """ Return the next part of the body of at most size bytes, or b"" when the body is complete """
+        if self._connection is None:
+            return b""
+
+        reader = self._connection.reader
+        timeout = self._client.timeout
+        try:
+            if self._chunked and self._remaining == 0:
+                if self._chunk_started:
+                    await asyncio.wait_for(reader.readline(), timeout)  # CRLF after the chunk data
+                line = await asyncio.wait_for(reader.readline(), timeout)
+                try:
+                    self._remaining = int(line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise ClientError(f"invalid chunk size {line}")
+                self._chunk_started = True
+                if self._remaining == 0:  # last chunk
+                    await read_header(reader, dict(), timeout)  # trailer
+                    self._finish()
+                    return b""
+
+            if self._remaining is None:  # body ends when the connection closes
+                data = await asyncio.wait_for(reader.read(size), timeout)
+                if not data:
+                    self._finish()
+                return data
+
+            data = await asyncio.wait_for(reader.read(min(size, self._remaining)), timeout)
+            if not data:
+                raise ClientError("connection closed before end of body")
+        except BaseException:
+            self.close()
+            raise
+
+        self._remaining -= len(data)
+        if self._remaining == 0 and not self._chunked:
+            self._finish()
+        return data
+
+    async def body(self):
+        """ Read and return the complete body """
+        chunks = []
+        while True:
+            data = await self.read()
+            if not data:
+                break
+            chunks.append(data)
+        return b"".join(chunks)
+
+    def _finish(self):
+        """ Body completely read, return the connection to its pool """
+        if self._connection is not None:
+            self._client._release(self._connection, self._reusable)
+            self._connection = None
+
+    def close(self):
+        """ Stop reading the body and close the connection """
+        if self._connection is not None:
+            self._client._release(self._connection, False)
+            self._connection = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+class Client:
+
+    def __init__(self, size=4, timeout=10, idle=30):
+        """ Create an HTTP client
+
+        :param int size: maximum number of connections per host
+        :param int timeout: seconds to wait for a connection, connect or read
+        :param int idle: seconds after which an unused connection is closed
+        """
+        self.size = size
+        self.timeout = timeout
+        self.idle = idle
+        self.requests = 0
+        self.opened = 0  # connections
+        self.reused = 0  # requests sent on a kept alive connection
+        self.evicted = 0  # connections closed because idle too long
+        self._pools = dict()  # (host, port) -> _Pool
+
+    async def request(self, method, host, port=80, path="/", header=None, body=None):
+        """ Send a request and return the Response once its header has been received
+
+        :param str method: request method ("GET", "POST", ...)
+        :param str host: name or address of the server
+        :param int port: port of the server
+        :param str path: path including the query string (if any)
+        :param dict header: request header fields, str or bytes
+        :param bytes body: request body, str or bytes
+        :return Response: response, read the body before sending the next request
+        :raises ClientError: if the response is malformed
+        :raises asyncio.TimeoutError: if the server did not answer in time
+        """
+        data = _compose(method, host, port, path, header, body)
+        self.requests += 1
+
+        for attempt in range(2):
+            connection = await self._acquire(host, port)
+            try:
+                connection.writer.write(data)
+                await connection.writer.drain()
+                status_line = await asyncio.wait_for(connection.reader.readline(), self.timeout)
+                if not status_line:
+                    raise ClientError("connection closed by server")
+                connection.requests += 1
+                break
+            except BaseException as e:  # includes cancellation, the connection must go back to the pool
+                self._release(connection, False)
+                if isinstance(e, asyncio.TimeoutError) or not isinstance(e, (OSError, ClientError)):
+                    raise e
+                if connection.requests == 0 or attempt > 0 or method not in _IDEMPOTENT:
+                    raise e
+                # else the server closed the kept alive connection, send the request on a new one
+
+        try:
+            version, status, reason = (status_line.strip().split(None, 2) + [b""])[:3]
+            if not version.startswith(b"HTTP/"):
+                raise ValueError
+            status = int(status)
+            header = dict()
+            await read_header(connection.reader, header, self.timeout)
+        except ValueError:
+            self._release(connection, False)
+            raise ClientError(f"invalid status line {status_line}")
+        except BaseException:
+            self._release(connection, False)
+            raise
+
+        try:
+            return Response(self, connection, method, version[5:].decode("utf-8"), status, reason.decode("utf-8"), header)
+        except BaseException:  # like ClientError for a malformed header
+            self._release(connection, False)
+            raise
+
+    async def get(self, host, port=80, path="/", header=None):
+        """ Send a GET request and return the complete body, raise ClientError unless the status is 200 """
+        async with await self.request("GET", host, port, path, header) as response:
+            if response.status != 200:
+                raise ClientError(f"{host}:{port}{path} returned {response.status} {response.reason}")
+            return await response.body()
+
+    async def _acquire(self, host, port):
+        """ Return a kept alive or a new connection to host:port """
+        pool = self._pools.get((host, port))
+        if pool is None:
+            pool = _Pool(host, port)
+            self._pools[(host, port)] = pool
+
+        while True:
+            self._evict(pool)
+            if pool.idle:
+                pool.active += 1
+                self.reused += 1
+                return pool.idle.pop()
+            if pool.active + len(pool.idle) < self.size:
+                break
+            pool.event.clear()  # all connections in use, wait until one is returned
+            await asyncio.wait_for(pool.event.wait(), self.timeout)
+
+        pool.active += 1
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        except BaseException:
+            pool.active -= 1
+            pool.event.set()
+            raise
+        self.opened += 1
+        return _Connection(pool, reader, writer)
+
+    def _release(self, connection, reusable):
+        """ Return a connection to its pool, or close it """
+        pool = connection.pool
+        pool.active -= 1
+        if reusable:
+            connection.used = ticks_ms()
+            pool.idle.append(connection)
+        else:
+            connection.writer.close()
+        pool.event.set()
+
+    def _evict(self, pool):
+        """ Close connections of pool which have been idle too long """
+        now = ticks_ms()
+        for connection in [c for c in pool.idle if ticks_diff(now, c.used) > self.idle * 1000]:
+            pool.idle.remove(connection)
+            connection.writer.close()
+            self.evicted += 1
+
+    def close(self):
+        """ Close all idle connections """
+        for pool in self._pools.values():
+            for connection in pool.idle:
+                connection.writer.close()
+            pool.idle.clear()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "opened": self.opened,
+            "reused": self.reused,
+            "evicted": self.evicted,
+            "active": sum(pool.active for pool in self._pools.values()),
+            "idle": sum(len(pool.idle) for pool in self._pools.values())
+        }
+
+
+def _compose(method, host, port, path, header, body):
+    """ Return request line, header fields and body as bytes """
+    lines = [f"{method} {path} HTTP/1.1\r\nHost: {host}{'' if port == 80 else f':{port}'}\r\n".encode("utf-8")]
+    if header is not None:
+        for name, value in header.items():
+            if isinstance(name, str):
+                name = name.encode("utf-8")
+            if not isinstance(value, bytes):
+                value = str(value).encode("utf-8")
+            lines.append(name + b": " + value + b"\r\n")
+    if body is not None:
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        lines.append(f"Content-Length: {len(body)}\r\n".encode("utf-8"))
+    lines.append(b"\r\n")
+    if body is not None:
+        lines.append(body)
+    return b"".join(lines)
+
+
+def proxy(client, host, port=80, prefix=""):
+    """ Return a handler which forwards the request to host:port and relays the response part by part
+
+    :param Client client: client used to forward the request
+    :param str host: name or address of the upstream server
+    :param int port: port of the upstream server
+    :param str prefix: removed from the front of the request URL before forwarding
+    """
+
+    async def forward(reader, writer, request):
+        url = request.url
+        if prefix and url.startswith(prefix):
+            url = url[len(prefix):] or "/"
+
+        header = dict()
+        for name, value in request.header.items():
+            if name.lower() not in _HOP_BY_HOP and name.lower() not in (b"host", b"content-length"):
+                header[name] = value
+
+        body = None
+        length = field(request.header, b"Content-Length")
+        if length is not None:
+            try:
+                length = int(length)
+            except ValueError:
+                await HTTPResponse(400, "text/plain", close=True).send(writer)
+                return
+            body = await asyncio.wait_for(reader.readexactly(length), client.timeout)
+
+        try:
+            response = await client.request(request.method, host, port, url, header, body)
+        except asyncio.TimeoutError:
+            await HTTPResponse(504, "text/plain", close=True).send(writer)
+            return
+        except (OSError, ClientError):
+            await HTTPResponse(502, "text/plain", close=True).send(writer)
+            return
+
+        async with response:
+            lines = [f"HTTP/1.1 {response.status} {response.reason}\r\n".encode("utf-8")]
+            for name, value in response.header.items():
+                if name.lower() not in _HOP_BY_HOP:
+                    lines.append(name + b": " + value + b"\r\n")
+            lines.append(b"Connection: close\r\n\r\n")  # body ends when the connection closes if chunked
+            writer.write(b"".join(lines))
+            while True:
+                data = await response.read()
+                if not data:
+                    break
+                writer.write(data)
+                if hasattr(writer, "flush"):  # BufferedWriter, relay every part at once
+                    await writer.flush()
+                else:
+                    await writer.drain()
+
+    return forward
@@ -0,0 +1,65 @@
+# Cross-origin resource sharing (CORS) policy
+#
+# Usage:
+#
+#   from ahttpserver import HTTPServer
+#   from ahttpserver.cors import CORS
+#
+#   app = HTTPServer(cors=CORS(origin=["http://dashboard.local"], max_age=86400))
+#
+# With a policy in place the server adds Access-Control-Allow-Origin to the
+# response for every request coming from an allowed origin, and answers
+# preflight requests (OPTIONS plus Access-Control-Request-Method) itself
+# using the methods registered for the path. Access-Control-Max-Age tells the
+# browser how long it may cache the preflight result, so it does not need to
+# repeat it before every request.
+#
+# See also: https://fetch.spec.whatwg.org/#http-cors-protocol
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+
+class CORS:
+
+    def __init__(self, origin="*", headers="Content-Type", max_age=86400, credentials=False):
+        """ Create a CORS policy
+
+        :param origin: "*" to allow any origin, else a list of allowed origins
+        :param str headers: request header fields a client may send
+        :param int max_age: seconds a browser may cache a preflight response
+        :param bool credentials: allow requests which include credentials (cookies)
+        """
+        if origin == "*":
+            self.origins = None
+        else:
+            self.origins = [o.encode("utf-8") for o in origin]  # header values are bytes
+        self.headers = headers
+        self.max_age = max_age
+        self.credentials = credentials
+
+    def header(self, origin):
+        """ Return the header fields to add to a response for a request from origin
+
+        :param bytes origin: value of the Origin request header field
+        :return bytes: header fields, or None if the origin is not allowed
+        """
+        if self.origins is None and not self.credentials:
+            return b"Access-Control-Allow-Origin: *\r\n"
+        if self.origins is not None and origin not in self.origins:
+            return None
+        # credentials cannot be combined with '*', so echo the origin
+        header = b"Access-Control-Allow-Origin: " + origin + b"\r\nVary: Origin\r\n"
+        if self.credentials:
+            header += b"Access-Control-Allow-Credentials: true\r\n"
+        return header
+
+    def preflight(self, methods):
+        """ Return the header fields specific for a preflight response
+
+        :param str methods: comma separated methods allowed for the requested path
+        :return bytes: header fields
+        """
+        return f"Access-Control-Allow-Methods: {methods}\r\n" \
+               f"Access-Control-Allow-Headers: {self.headers}\r\n" \
+               f"Access-Control-Max-Age: {self.max_age}\r\n".encode("utf-8")
@@ -0,0 +1,185 @@
+# Event loop lag monitor
+#
+# Usage:
+#
+#   from ahttpserver import HTTPServer
+#   from ahttpserver.lagmonitor import LagMonitor
+#
+#   app = HTTPServer(lagmonitor=LagMonitor(interval=100, threshold=50))
+#
+#   ...
+#   print(app.stats()["lagmonitor"])
+#
+# All handlers share one event loop. A handler which computes for a long
+# time, or calls a blocking function, without awaiting stalls all other
+# connections. The monitor is a task which sleeps 'interval' ms and measures
+# how much later than that it wakes up: the loop lag. Lags are counted in a
+# histogram. A lag above 'threshold' ms is a stall.
+# The server runs every handler through wrap(), which times each step of
+# the handler: the time from resuming its coroutine until it awaits again.
+# Only a step can hold up the loop, so a stall is blamed on the routes with
+# a step during the measurement which took at least as long as the lag.
+# Handlers which are merely waiting, like an idle event stream or a slow
+# upstream request, are not blamed. Per route the number of requests, the
+# average and maximum wall time, the longest step and the number of stalls
+# are kept.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+try:
+    import uasyncio as asyncio
+except ImportError:  # CPython
+    import asyncio
+
+from .ticks import ticks_diff, ticks_ms
+
+try:
+    sleep_ms = asyncio.sleep_ms
+except AttributeError:  # CPython
+    async def sleep_ms(ms):
+        await asyncio.sleep(ms / 1000)
+
+BUCKETS = (5, 10, 20, 50, 100, 200, 500, 1000)  # upper bounds in ms of the lag histogram
+
+
+class LagMonitor:
+
+    def __init__(self, interval=100, threshold=50, recent=8):
+        """ Create an event loop lag monitor
+
+        :param int interval: ms between measurements
+        :param int threshold: lag in ms which counts as a stall
+        :param int recent: number of most recent stalls to remember
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.recent = recent
+        self.stalls = []  # most recent stalls as (lag in ms, routes blamed)
+        self._histogram = [0] * (len(BUCKETS) + 1)  # last one counts lags above BUCKETS[-1]
+        self._max_lag_ms = 0
+        self._stall_count = 0
+        self._steps = []  # (route, ms) of steps above threshold during the current measurement
+        self._routes = dict()  # route -> [requests, total ms, max ms, stalls, max step ms]
+
+    def wrap(self, route, coro):
+        """ Return an awaitable which runs handler coroutine coro and times its steps
+
+        :param str route: method and path of the handler, like "GET /"
+        :param coro: coroutine returned by the handler function
+        """
+        return _Timed(self, route, coro)
+
+    def _step(self, route, start):
+        """ Called after every step of a handler """
+        elapsed = ticks_diff(ticks_ms(), start)
+        counters = self._counters(route)
+        if elapsed > counters[4]:
+            counters[4] = elapsed
+        if elapsed > self.threshold:
+            self._steps.append((route, elapsed))
+
+    def _end(self, route, start):
+        """ Called when a handler is finished, also if it raised an exception """
+        elapsed = ticks_diff(ticks_ms(), start)
+        counters = self._counters(route)
+        counters[0] += 1
+        counters[1] += elapsed
+        if elapsed > counters[2]:
+            counters[2] = elapsed
+
+    def _counters(self, route):
+        counters = self._routes.get(route)
+        if counters is None:
+            counters = [0, 0, 0, 0, 0]
+            self._routes[route] = counters
+        return counters
+
+    async def run(self):
+        """ Task which measures the loop lag """
+        while True:
+            start = ticks_ms()
+            await sleep_ms(self.interval)
+            lag = ticks_diff(ticks_ms(), start) - self.interval
+            self._record(lag)
+            self._steps.clear()
+
+    def _record(self, lag):
+        for i, bound in enumerate(BUCKETS):
+            if lag <= bound:
+                self._histogram[i] += 1
+                break
+        else:
+            self._histogram[-1] += 1
+        if lag > self._max_lag_ms:
+            self._max_lag_ms = lag
+
+        if lag > self.threshold:
+            self._stall_count += 1
+            blamed = []
+            for route, elapsed in self._steps:
+                if elapsed >= lag and route not in blamed:
+                    blamed.append(route)
+            for route in blamed:
+                self._counters(route)[3] += 1
+            self.stalls.append((lag, blamed))
+            if len(self.stalls) > self.recent:
+                self.stalls.pop(0)
+
+    def stats(self):
+        histogram = dict()
+        for bound, count in zip(BUCKETS, self._histogram):
+            histogram[f"<={bound}"] = count
+        histogram[f">{BUCKETS[-1]}"] = self._histogram[-1]
+        routes = dict()
+        for route, (requests, total, maximum, stalls, step) in self._routes.items():
+            routes[route] = {
+                "requests": requests,
+                "avg_ms": total // requests if requests else 0,
+                "max_ms": maximum,
+                "max_step_ms": step,
+                "stalls": stalls
+            }
+        return {
+            "max_lag_ms": self._max_lag_ms,
+            "stalls": self._stall_count,
+            "lag_ms": histogram,
+            "routes": routes
+        }
+
+
+class _Timed:
+    """ Awaitable which runs a handler coroutine and reports the duration of every step to the monitor """
+
+    def __init__(self, monitor, route, coro):
+        self._monitor = monitor
+        self._route = route
+        self._coro = coro
+        self._start = ticks_ms()
+
+    def __await__(self):
+        return self
+
+    __iter__ = __await__
+
+    def __next__(self):
+        return self.send(None)
+
+    def send(self, value):
+        return self._resume(self._coro.send, value)
+
+    def throw(self, *args):  # like CancelledError
+        return self._resume(self._coro.throw, *args)
+
+    def close(self):
+        self._coro.close()
+
+    def _resume(self, method, *args):
+        start = ticks_ms()
+        try:
+            return method(*args)
+        except BaseException:  # StopIteration when the handler returns
+            self._monitor._end(self._route, self._start)
+            raise
+        finally:
+            self._monitor._step(self._route, start)
@@ -0,0 +1,200 @@
+# Multi-process mode for CPython
+#
+# Usage:
+#
+#   from ahttpserver import HTTPServer
+#   from ahttpserver.multiprocess import Supervisor
+#
+#   app = HTTPServer(port=8080)
+#
+#   @app.route("GET", "/")
+#   ...
+#
+#   if __name__ == "__main__":
+#       Supervisor(app, workers=4, report=print).run()
+#
+# One event loop uses one core. On a multi-core Linux machine the supervisor
+# forks 'workers' processes (default one per core), each running its own
+# event loop with the same app. The workers bind the same port with
+# SO_REUSEPORT so the kernel spreads new connections over them. Where
+# SO_REUSEPORT is not available the supervisor binds the listening socket
+# once and the workers share it.
+# A worker which dies is restarted. Every 'interval' seconds each worker
+# sends app.stats() to the supervisor over a pipe, supervisor.stats()
+# combines them and, if given, 'report' is called with the result.
+# SIGINT or SIGTERM stops the supervisor, which then lets every worker stop
+# its server via HTTPServer.stop().
+# Route code does not change, but keep in mind that workers do not share
+# memory: state kept in Python objects is per worker.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import asyncio
+import json
+import os
+import select
+import signal
+import socket
+import time
+
+
+class Supervisor:
+
+    def __init__(self, app, workers=None, interval=10, report=None):
+        """ Create a supervisor for app
+
+        :param HTTPServer app: the server to run in every worker
+        :param int workers: number of worker processes, default number of cores
+        :param int interval: seconds between stats updates from the workers
+        :param callable report: called with the combined stats every interval
+        """
+        self.app = app
+        self.workers = workers or os.cpu_count() or 1
+        self.interval = interval
+        self.report = report
+        self.restarts = 0
+        self._sock = None  # shared listening socket if there is no SO_REUSEPORT
+        self._children = dict()  # pid -> pipe read end
+        self._buffers = dict()  # pipe read end -> incomplete line
+        self._stats = dict()  # pid -> last stats received
+        self._stopping = False
+
+    def run(self):
+        if not hasattr(socket, "SO_REUSEPORT"):
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._sock.bind((self.app.host, self.app.port))
+            self._sock.listen(self.app.backlog)
+            self._sock.setblocking(False)
+
+        for _ in range(self.workers):
+            self._spawn()
+
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+
+        reported = time.monotonic()
+        while self._children:
+            self._read(1)
+            self._reap()
+            if self.report is not None and time.monotonic() - reported >= self.interval:
+                reported = time.monotonic()
+                self.report(self.stats())
+
+        if self._sock is not None:
+            self._sock.close()
+        print("supervisor stopped")
+
+    def _stop(self, signum, frame):
+        if not self._stopping:
+            self._stopping = True
+            for pid in self._children:
+                os.kill(pid, signal.SIGTERM)
+
+    def _spawn(self):
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # worker
+            os.close(r)
+            code = 0
+            try:
+                asyncio.run(self._serve(w))
+            except BaseException as e:
+                print(f"worker {os.getpid()} failed: {e!r}")
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(w)
+        self._children[pid] = r
+        self._buffers[r] = b""
+
+    async def _serve(self, pipe):
+        """ Run the server in a worker until SIGINT or SIGTERM is received """
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+
+        await self.app.start(sock=self._sock, reuse_port=self._sock is None)
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            os.write(pipe, json.dumps(self.app.stats()).encode("utf-8") + b"\n")
+        await self.app.stop()
+
+    def _read(self, timeout):
+        """ Collect stats sent by the workers """
+        pipes = {r: pid for pid, r in self._children.items()}
+        try:
+            readable, _, _ = select.select(list(pipes), [], [], timeout)
+        except InterruptedError:
+            return
+        for r in readable:
+            data = self._buffers[r] + os.read(r, 65536)
+            *lines, self._buffers[r] = data.split(b"\n")
+            if lines:
+                self._stats[pipes[r]] = json.loads(lines[-1])
+
+    def _reap(self):
+        """ Remove workers which exited, and restart them unless stopping """
+        while self._children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            r = self._children.pop(pid, None)
+            if r is None:
+                continue
+            os.close(r)
+            del self._buffers[r]
+            self._stats.pop(pid, None)
+            if not self._stopping:
+                print(f"worker {pid} exited with status {status}, restarting")
+                self.restarts += 1
+                time.sleep(1)  # avoid a tight loop when workers fail at start
+                self._spawn()
+
+    def stats(self):
+        """ Return the last stats of every worker and their combination """
+        return {
+            "workers": len(self._children),
+            "restarts": self.restarts,
+            "total": _combine(list(self._stats.values()))
+        }
+
+
+# values which are not counters, the combined value is their mean
+_GAUGES = ("workers", "threshold", "per_request")
+
+# count each avg_ value is taken over, the combined value is weighted by it
+_WEIGHTS = {"avg_ms": "requests", "avg_pause_ms": "collections", "avg_handshake_ms": "handshakes"}
+
+
+def _combine(stats):
+    """ Combine a list of stats dicts: sum counters, take the maximum of max_ values, the weighted mean
+    of avg_ values and the mean of gauges. A key missing in some of the dicts is combined from the others.
+    """
+    combined = dict()
+    for worker in stats:
+        for key in worker:
+            if key in combined:
+                continue
+            present = [s for s in stats if key in s]
+            values = [s[key] for s in present]
+            if isinstance(values[0], dict):
+                combined[key] = _combine(values)
+            elif key.startswith("max"):
+                combined[key] = max(values)
+            elif key.startswith("avg"):
+                weights = [s.get(_WEIGHTS.get(key), 1) for s in present]
+                total = sum(weights)
+                combined[key] = sum(v * w for v, w in zip(values, weights)) // total if total else 0
+            elif key in _GAUGES:
+                combined[key] = sum(values) // len(values)
+            else:
+                combined[key] = sum(values)
+    return combined
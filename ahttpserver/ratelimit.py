@@ -0,0 +1,123 @@
+# Per-client token-bucket rate limiting
+#
+# Usage:
+#
+#   from ahttpserver import HTTPServer
+#   from ahttpserver.ratelimit import RateLimiter
+#
+#   limiter = RateLimiter(rate=5, burst=10)  # per client 5 requests/s, bursts up to 10
+#   limiter.limit("/api/sweep", rate=0.5, burst=2)  # stricter for an expensive route
+#
+#   app = HTTPServer(ratelimiter=limiter)
+#
+# Every client (IP address) owns a bucket holding at most 'burst' tokens,
+# which is refilled with 'rate' tokens per second. Each request takes one
+# token. When the bucket is empty the server answers with a precomputed
+# 429 Too Many Requests response, before the request header is parsed or
+# a handler is called. A route with its own limit gets a separate bucket
+# per client.
+# Buckets are kept in a fixed size table. When the table is full the least
+# recently used bucket is taken over, so memory use does not depend on the
+# number of clients.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+from .ticks import ticks_diff, ticks_ms
+
+_TOKEN = 1000000  # one token, tokens are counted in millionths to avoid floats
+
+
+class RateLimiter:
+
+    def __init__(self, rate=5, burst=10, size=16):
+        """ Create a rate limiter
+
+        :param float rate: tokens added per second
+        :param int burst: maximum number of tokens in a bucket
+        :param int size: maximum number of buckets (clients) tracked
+        """
+        self.size = size
+        self.rejected = 0
+        self._default = _policy(rate, burst)
+        self._routes = dict()  # path -> policy for routes with their own limit
+        self._slots = dict()  # bucket key -> index in the table below
+        self._keys = [None] * size
+        self._tokens = [0] * size
+        self._stamps = [0] * size  # ticks_ms of last use
+
+    def limit(self, path, rate, burst):
+        """ Give a route its own limit """
+        self._routes[path] = _policy(rate, burst)
+
+    def allow(self, address, path):
+        """ Take a token from the bucket of a client
+
+        :param str address: client IP address
+        :param str path: request path
+        :return bytes: None if the request may proceed, else the response to send
+        """
+        policy = self._routes.get(path)
+        if policy is None:
+            policy = self._default
+            key = address
+        else:
+            key = (address, path)
+
+        rate, capacity, fill_ms, response = policy
+        now = ticks_ms()
+
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._evict()
+            self._slots[key] = slot
+            self._keys[slot] = key
+            tokens = capacity
+        else:
+            elapsed = ticks_diff(now, self._stamps[slot])
+            if elapsed >= fill_ms:
+                tokens = capacity
+            else:
+                tokens = min(capacity, self._tokens[slot] + elapsed * rate)
+
+        self._stamps[slot] = now
+
+        if tokens < _TOKEN:
+            self._tokens[slot] = tokens
+            self.rejected += 1
+            return response
+
+        self._tokens[slot] = tokens - _TOKEN
+        return None
+
+    def _evict(self):
+        """ Return the index of a free slot, or else of the least recently used one """
+        if len(self._slots) < self.size:
+            return len(self._slots)
+
+        stamps = self._stamps
+        slot = 0
+        for i in range(1, self.size):
+            if ticks_diff(stamps[slot], stamps[i]) > 0:
+                slot = i
+
+        del self._slots[self._keys[slot]]
+        return slot
+
+    def stats(self):
+        return {"clients": len(self._slots), "rejected": self.rejected}
+
+
+def _policy(rate, burst):
+    """ Precompute everything allow() needs for a rate and burst.
+
+    :return tuple: (refill per ms, bucket capacity, ms to fill an empty bucket, 429 response)
+    """
+    rate = int(rate * 1000)  # millionths of a token per ms
+    if rate < 1:
+        raise ValueError("rate too small")
+    capacity = burst * _TOKEN
+    wait_ms = -(-_TOKEN // rate)  # time to earn one token, rounded up
+    retry_after = max(1, -(-wait_ms // 1000))
+    response = f"HTTP/1.1 429 Too Many Requests\r\nRetry-After: {retry_after}\r\nConnection: close\r\n\r\n".encode("utf-8")
+    return rate, capacity, capacity // rate + 1, response
@@ -9,8 +9,14 @@
 
 reason = {
     200: "OK",
+    204: "No Content",
+    304: "Not Modified",
     400: "Bad Request",
-    404: "Not Found"
+    404: "Not Found",
+    429: "Too Many Requests",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout"
 }
 
 class HTTPResponse:
@@ -31,17 +37,74 @@ class HTTPResponse:
         else:
             self.header=header
 
-    async def send(self, writer):
-        """ Send response to stream writer """
-        writer.write(f"HTTP/1.1 {self.status} {reason.get(self.status, 'NA')}\n")
+    def encode(self):
+        """ Return status line and header fields as bytes """
+        lines = [f"HTTP/1.1 {self.status} {reason.get(self.status, 'NA')}\n"]
         if self.mimetype is not None:
-            writer.write(f"Content-Type: {self.mimetype}\n")
+            lines.append(f"Content-Type: {self.mimetype}\n")
         if self.close:
-            writer.write("Connection: close\n")
+            lines.append("Connection: close\n")
         else:
-            writer.write("Connection: keep-alive\n")
+            lines.append("Connection: keep-alive\n")
         if len(self.header) > 0:
             for key, value in self.header.items():
-                writer.write(f"{key}: {value}\n")
-        writer.write("\n")
+                lines.append(f"{key}: {value}\n")
+        lines.append("\n")
+        return "".join(lines).encode("utf-8")
+
+    async def send(self, writer):
+        """ Send response to stream writer """
+        writer.write(self.encode())
         await writer.drain()
+
+
+class ResponseFilter:
+    """ Wrap a connection to add header fields to, or drop the body from, the response sent by a handler
+
+    The end of the response header is recognized by an empty line. Extra
+    header fields are inserted just before it. Anything written after it is
+    passed through, or dropped when discard_body is true (as for HEAD requests).
+    Other attributes are taken from the wrapped connection.
+    """
+
+    def __init__(self, conn, header=None, body=True):
+        """ :param conn: socket or stream writer to wrap
+            :param bytes header: header field lines to add, each ending in CRLF
+            :param bool body: if false drop everything after the header
+        """
+        self.conn = conn
+        self.header = header
+        self.discard_body = not body  # checked by sendfile() to skip reading the file
+        self._newlines = 0  # consecutive line ends seen, 2 marks the end of the header
+        self._in_body = False
+
+    def write(self, data):
+        if self._in_body:
+            if not self.discard_body:
+                self.conn.write(data)
+            return
+
+        start = 0  # start of the current line in data
+        for i in range(len(data)):
+            c = data[i]
+            if c == 10 or c == "\n":
+                self._newlines += 1
+                if self._newlines == 2:  # data[start:i + 1] is the empty line closing the header
+                    self._in_body = True
+                    if start > 0:
+                        self.conn.write(data[:start])
+                    if self.header is not None:
+                        self.conn.write(self.header)
+                    if self.discard_body:
+                        self.conn.write(data[start:i + 1])
+                    else:
+                        self.conn.write(data[start:])
+                    return
+                start = i + 1
+            elif c != 13 and c != "\r":
+                self._newlines = 0
+
+        self.conn.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
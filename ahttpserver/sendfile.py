@@ -1,11 +1,31 @@
 # Memory efficient file transfer
 #
+# On MicroPython the file is sent in chunks via a small pre-allocated buffer.
+# On CPython, when the connection is a plain socket, the kernel copies the
+# file to the socket (os.sendfile via loop.sendfile) without passing it
+# through Python. Where that is not possible (like over TLS) a large file is
+# memory mapped and written in slices, instead of read and copied chunk by
+# chunk.
+#
 # Copyright 2021 (c) Erik de Lange
 # Released under MIT license
 
+try:
+    import uasyncio as asyncio
+except ImportError:  # CPython
+    import asyncio
+
+try:
+    import mmap
+except ImportError:  # MicroPython
+    mmap = None
+
 _buffer = bytearray(512)  # adjust size to your systems available memory
 _bmview = memoryview(_buffer)  # reuse pre-allocated _buffer
 
+_MMAP_SIZE = 65536  # smaller files are sent via _buffer
+_MMAP_CHUNK = 65536
+
 
 async def sendfile(conn, filename):
     """ Send a file to a connection in chunks - lowering memory usage.
@@ -13,10 +33,40 @@ async def sendfile(conn, filename):
     :param socket conn: connection to send the file content to
     :param str filename: name of file to send
     """
+    if getattr(conn, "discard_body", False):  # response to HEAD request
+        return
     with open(filename, "rb") as fp:
-        while True:
-            n = fp.readinto(_buffer)
-            if n == 0:
-                break
-            conn.write(_bmview[:n])
-            await conn.drain()
+        transport = getattr(conn, "transport", None)  # only a CPython stream writer has one
+        if transport is not None:
+            if hasattr(conn, "flush"):  # BufferedWriter, send the header first
+                await conn.flush()
+            else:
+                await conn.drain()
+            try:
+                await asyncio.get_running_loop().sendfile(transport, fp, fallback=False)
+                return
+            except (RuntimeError, asyncio.SendfileNotAvailableError):  # not possible for this transport, like TLS
+                pass
+            size = fp.seek(0, 2)
+            fp.seek(0)
+            if size >= _MMAP_SIZE:
+                await _send_mmap(conn, fp, size)
+                return
+        await _send_buffered(conn, fp)
+
+
+async def _send_buffered(conn, fp):
+    while True:
+        n = fp.readinto(_buffer)
+        if n == 0:
+            break
+        conn.write(_bmview[:n])
+        await conn.drain()
+
+
+async def _send_mmap(conn, fp, size):
+    # not closed explicitly, the transport may still hold slices of it
+    view = memoryview(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+    for i in range(0, size, _MMAP_CHUNK):
+        conn.write(view[i:i + _MMAP_CHUNK])
+        await conn.drain()
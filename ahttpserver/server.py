@@ -23,104 +23,315 @@
 # reader and writer and an object with details from the request (see url.py
 # for exact content). The handler must construct and send a correct HTTP
 # response. To avoid typos use the HTTPResponse component from response.py.
-# When leaving the handler the connection is closed.
+# What the handler writes is buffered (see buffered.py) and sent when the
+# buffer is full, when the handler awaits writer.flush() or when it returns.
+# When leaving the handler the connection is closed, unless the return code
+# of the handler is CONNECTION_KEEP_ALIVE. Then the server waits for the next
+# request on the same connection, so the response must carry a Content-Length
+# header (or else the client cannot tell where the body ends).
+# Handlers declared with @route(method, path, blocking=True) are plain functions
+# which receive a writer and the request, and run on a worker thread (see
+# workers.py).
+# With @route(method, path, singleflight=SingleFlight()) concurrent identical
+# requests wait for one execution of the handler and share its response (see
+# singleflight.py).
+# A handler declared with @route(method, path, streaming=True) keeps sending
+# for a long time (like an event stream). It does not count as a request in
+# flight for the garbage collection scheduler (see gcscheduler.py), which
+# would otherwise never find the server idle.
 # Any (method, path) combination which has not been declared using @route
-# will, when received by the server, result in a 404 HTTP error.
+# will, when received by the server, result in a 404 HTTP error. Exceptions
+# are HEAD, which is answered by the GET handler for the path without sending
+# the body, and OPTIONS, which is answered from the registered routes.
+# Request objects are reused for later requests, so a handler must not keep a
+# reference to the request after it returns.
 #
 # Copyright 2021 (c) Erik de Lange
 # Released under MIT license
 
 import errno
 
-import uasyncio as asyncio
+try:
+    import uasyncio as asyncio
+except ImportError:  # CPython
+    import asyncio
 
-from .response import HTTPResponse
-from .url import HTTPRequest, InvalidRequest
+from .buffered import BufferedWriter
+from .response import HTTPResponse, ResponseFilter
+from .url import InvalidRequest, RequestPool
+
+CONNECTION_CLOSE = 0
+CONNECTION_KEEP_ALIVE = 1
+
+# errors which mean the client is gone, on CPython also ConnectionError (errno may be None)
+_DISCONNECTED = (errno.ECONNRESET, errno.ECONNABORTED, errno.ENOTCONN)
+try:
+    _ConnectionError = ConnectionError
+except NameError:  # MicroPython
+    _ConnectionError = ()
 
 
 class HTTPServerError(Exception):
     pass
 
 
+async def read_header(reader, header, timeout):
+    """ Read header fields up to and including the empty line which ends the header
+
+    :param StreamReader reader: stream to read from
+    :param dict header: dict to add name / value (both bytes) to
+    :param int timeout: seconds to wait for every line
+    """
+    while True:
+        line = await asyncio.wait_for(reader.readline(), timeout)
+
+        if line in [b"", b"\r\n", b"\n"]:
+            break
+        else:
+            if line.find(b":") != -1:
+                name, value = line.split(b':', 1)
+                header[name] = value.strip()
+
+
 class HTTPServer:
 
-    def __init__(self, host="0.0.0.0", port=80, backlog=5, timeout=30):
+    def __init__(self, host="0.0.0.0", port=80, backlog=5, timeout=30,
+                 ratelimiter=None, cors=None, tls=None, profiler=None, gcscheduler=None, workers=None,
+                 lagmonitor=None):
         self.host = host
         self.port = port
         self.backlog = backlog
         self.timeout = timeout
+        self.ratelimiter = ratelimiter  # optional ratelimit.RateLimiter
+        self.cors = cors  # optional cors.CORS policy
+        self.tls = tls  # optional tls.TLS configuration
+        self.profiler = profiler  # optional profiler.Profiler
+        self.gcscheduler = gcscheduler  # optional gcscheduler.GCScheduler
+        self.workers = workers  # workers.WorkerPool for blocking handlers, created when needed
+        self.lagmonitor = lagmonitor  # optional lagmonitor.LagMonitor
+        self.requests = 0  # number of valid requests received
         self._server = None
+        self._tasks = []  # background tasks of the optional components
         self._routes = dict()  # stores link between (method, path) and function to execute
+        self._options_cache = dict()  # path -> (OPTIONS response, preflight header fields)
+        self._pool = RequestPool(backlog)  # request objects for reuse
+        self._buffers = []  # BufferedWriters for reuse
+        self._streaming = set()  # handlers with a long-lived response
+
+    def route(self, method="GET", path="/", blocking=False, singleflight=None, streaming=False):
+        """ Decorator which connects method and path to the decorated function.
 
-    def route(self, method="GET", path="/"):
-        """ Decorator which connects method and path to the decorated function. """
+        If blocking is true the function is a plain function which is run on a worker thread.
+        If singleflight is a singleflight.SingleFlight concurrent identical requests share one execution.
+        If streaming is true the function sends a long-lived response, like an event stream.
+        """
 
         if (method, path) in self._routes:
             raise HTTPServerError(f"route{(method, path)} already registered")
 
         def wrapper(function):
+            if blocking:
+                if self.workers is None:
+                    from .workers import WorkerPool
+                    self.workers = WorkerPool()
+                function = self.workers.handler(function)
+            if singleflight is not None:
+                function = singleflight.handler(function)
             self._routes[(method, path)] = function
+            if streaming:
+                self._streaming.add(function)
+            self._options_cache.clear()
 
         return wrapper
 
+    async def _discard_header(self, reader):
+        """ Read and discard header fields """
+        while True:
+            if await asyncio.wait_for(reader.readline(), self.timeout) in [b"", b"\r\n"]:
+                break
+
+    def _options(self, request):
+        """ Compose the response to an OPTIONS request from the route table.
+
+        :return bytes: response, or None if no route serves the requested path
+        """
+        cached = self._options_cache.get(request.path)
+        if cached is None:
+            methods = set(method for method, path in self._routes if path == request.path or request.path == "*")
+            if not methods:
+                return None
+            if "GET" in methods:
+                methods.add("HEAD")  # answered by the GET handler
+            methods.add("OPTIONS")
+            methods = ", ".join(sorted(methods))
+            preflight = None
+            if self.cors is not None:
+                preflight = self.cors.preflight(methods) + b"Connection: close\r\n\r\n"
+            cached = (f"HTTP/1.1 204 No Content\r\nAllow: {methods}\r\nConnection: close\r\n\r\n".encode("utf-8"), preflight)
+            self._options_cache[request.path] = cached
+
+        response, preflight = cached
+        origin = request.header.get(b"Origin")
+        if preflight is not None and origin is not None and b"Access-Control-Request-Method" in request.header:
+            allow = self.cors.header(origin)
+            if allow is not None:
+                return b"HTTP/1.1 204 No Content\r\n" + allow + preflight
+        return response
+
     async def _handle_request(self, reader, writer):
+        address = writer.get_extra_info('peername')[0]
+        request = None
+        profile = None
+        admitted = False  # by gcscheduler
         try:
-            request_line = await asyncio.wait_for(reader.readline(), self.timeout)
+            while True:
+                if self.profiler is not None:
+                    profile = self.profiler.begin()
 
-            if request_line in [b"", b"\r\n"]:
-                print(f"empty request line from {writer.get_extra_info('peername')[0]}")
-                return
+                request_line = await asyncio.wait_for(reader.readline(), self.timeout)
 
-            print(f"request_line {request_line} from {writer.get_extra_info('peername')[0]}")
+                if request_line in [b"", b"\r\n"]:
+                    if request is None:
+                        print(f"empty request line from {address}")
+                    return  # else client closed a kept alive connection
 
-            try:
-                request = HTTPRequest(request_line)
-            except InvalidRequest as e:
-                while True:
-                    # read and discard header fields
-                    if await asyncio.wait_for(reader.readline(), self.timeout) in [b"", b"\r\n"]:
-                        break
-                response = HTTPResponse(400, "text/plain", close=True)
-                await response.send(writer)
-                writer.write(repr(e).encode("utf-8"))
-                return
+                print(f"request_line {request_line} from {address}")
 
-            while True:
-                # read header fields and add name / value to dict 'header'
-                line = await asyncio.wait_for(reader.readline(), self.timeout)
-
-                if line in [b"", b"\r\n"]:
-                    break
-                else:
-                    if line.find(b":") != -1:
-                        name, value = line.split(b':', 1)
-                        request.header[name] = value.strip()
-
-            # search function which is connected to (method, path)
-            func = self._routes.get((request.method, request.path))
-            if func:
-                await func(reader, writer, request)
-            else:  # no function found for (method, path) combination
-                response = HTTPResponse(404)
-                await response.send(writer)
+                if self.gcscheduler is not None:
+                    self.gcscheduler.admit()
+                    admitted = True
+
+                if self.tls is not None and request is None:
+                    self.tls.established()
+
+                try:  # a kept alive connection reuses its request object
+                    request = self._pool.acquire(request_line, request)
+                except InvalidRequest as e:
+                    await self._discard_header(reader)
+                    response = HTTPResponse(400, "text/plain", close=True)
+                    await response.send(writer)
+                    writer.write(repr(e).encode("utf-8"))
+                    return
+
+                self.requests += 1
+
+                if self.ratelimiter is not None:
+                    response = self.ratelimiter.allow(address, request.path)
+                    if response is not None:  # too many requests
+                        await self._discard_header(reader)
+                        writer.write(response)
+                        return
+
+                if profile is not None:
+                    self.profiler.mark(profile)
+
+                await read_header(reader, request.header, self.timeout)
+
+                if profile is not None:
+                    self.profiler.mark(profile)
+
+                # search function which is connected to (method, path)
+                func = self._routes.get((request.method, request.path))
+                body = True
+                if func is None:
+                    if request.method == "HEAD":  # use the GET handler but send no body
+                        func = self._routes.get(("GET", request.path))
+                        body = False
+                    elif request.method == "OPTIONS":
+                        response = self._options(request)
+                        if response is not None:
+                            writer.write(response)
+                            return
+
+                if profile is not None:
+                    self.profiler.mark(profile)
+
+                if func:
+                    if admitted and func in self._streaming:  # do not hold back garbage collection
+                        self.gcscheduler.release()
+                        admitted = False
+                    header = None
+                    if self.cors is not None and b"Origin" in request.header:
+                        header = self.cors.header(request.header[b"Origin"])
+                    buffered = self._buffers.pop() if self._buffers else BufferedWriter()
+                    buffered.attach(writer)
+                    if header is not None or not body:
+                        handler_writer = ResponseFilter(buffered, header, body)
+                    else:
+                        handler_writer = buffered
+                    try:
+                        handler = func(reader, handler_writer, request)
+                        if self.lagmonitor is not None:
+                            handler = self.lagmonitor.wrap(f"{request.method} {request.path}", handler)
+                        result = await handler
+                    finally:
+                        try:  # also if the handler raised after writing its response
+                            await buffered.flush()
+                        except OSError:  # client gone
+                            pass
+                        buffered.attach(None)
+                        if len(self._buffers) < self.backlog:
+                            self._buffers.append(buffered)
+                    if profile is not None:
+                        self.profiler.end(profile, request)
+                    if result != CONNECTION_KEEP_ALIVE:
+                        return
+                    await writer.drain()  # wait for next request on this connection
+                    if admitted:
+                        self.gcscheduler.release()
+                        admitted = False
+                else:  # no function found for (method, path) combination
+                    response = HTTPResponse(404)
+                    await response.send(writer)
+                    if profile is not None:
+                        self.profiler.end(profile, request, found=False)
+                    return
 
         except asyncio.TimeoutError:
             pass
         except Exception as e:
-            if type(e) is OSError and e.errno == errno.ECONNRESET:  # connection reset by client
+            if isinstance(e, _ConnectionError) or (isinstance(e, OSError) and e.errno in _DISCONNECTED):  # client gone
                 pass
+            elif isinstance(e, OSError) and self.tls is not None and request is None:  # failed handshake
+                self.tls.failed += 1
             else:
                 raise e
         finally:
-            await writer.drain()
-            writer.close()
-            await writer.wait_closed()
+            try:
+                await writer.drain()
+                writer.close()
+                await writer.wait_closed()
+            except OSError:  # client already gone
+                writer.close()
+            if admitted:
+                self.gcscheduler.release()
+            if request is not None:
+                self._pool.release(request)
 
-    async def start(self):
-        print(f"HTTP server started on {self.host}:{self.port}")
-        self._server = await asyncio.start_server(self._handle_request, self.host, self.port, self.backlog)
+    async def start(self, sock=None, reuse_port=False):
+        """ Start the server.
+
+        :param socket sock: listen on this already bound socket instead of host and port (CPython only)
+        :param bool reuse_port: bind with SO_REUSEPORT (CPython only, see multiprocess.py)
+        """
+        print(f"HTTP{'S' if self.tls else ''} server started on {self.host}:{self.port}")
+        kwargs = {"backlog": self.backlog}
+        if self.tls is not None:
+            kwargs["ssl"] = self.tls.context
+        if reuse_port:
+            kwargs["reuse_port"] = True
+        if sock is not None:
+            self._server = await asyncio.start_server(self._handle_request, sock=sock, **kwargs)
+        else:
+            self._server = await asyncio.start_server(self._handle_request, self.host, self.port, **kwargs)
+        for component in (self.gcscheduler, self.lagmonitor):
+            if component is not None:
+                self._tasks.append(asyncio.create_task(component.run()))
 
     async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
         if self._server is not None:
             self._server.close()
             await self._server.wait_closed()
@@ -128,3 +339,12 @@ class HTTPServer:
             print("HTTP server stopped")
         else:
             print("HTTP server was not started")
+
+    def stats(self):
+        """ Return counters of the server and its optional components """
+        stats = {"requests": self.requests}
+        for name in ("ratelimiter", "tls", "gcscheduler", "workers", "lagmonitor"):
+            component = getattr(self, name)
+            if component is not None:
+                stats[name] = component.stats()
+        return stats
@@ -0,0 +1,138 @@
+# Coalesce concurrent identical requests into one handler execution
+#
+# Usage:
+#
+#   from ahttpserver import HTTPResponse, HTTPServer
+#   from ahttpserver.singleflight import SingleFlight
+#
+#   app = HTTPServer()
+#
+#   @app.route("GET", "/api/sweep", singleflight=SingleFlight(timeout=10))
+#   async def api_sweep(reader, writer, request):
+#       values = await sensor_sweep()  # expensive
+#       ...
+#
+# While the handler of a single-flight route runs, other requests for the
+# same key do not start the handler again. They wait until it finishes and
+# then receive a copy of the response it wrote. Thus ten dashboards which
+# reconnect at the same moment cause one sensor sweep, not ten.
+# The key is (method, url), so the query string is part of it. Pass a 'key'
+# function which receives the request to group requests differently, e.g.
+# key=lambda request: request.path to ignore the query string. Use a key
+# which includes the method, as a response to HEAD has no body.
+# The response is kept in memory until it has been sent to all waiters, and
+# only if it does not exceed 'limit' bytes. A waiter receives 503 Service
+# Unavailable when the handler takes longer than 'timeout' seconds, raised an
+# exception or wrote a larger response. Only use single-flight for requests
+# which have no body, and for handlers whose response does not depend on the
+# request header.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+try:
+    import uasyncio as asyncio
+except ImportError:  # CPython
+    import asyncio
+
+from .response import HTTPResponse
+
+
+class CaptureWriter:
+    """ Writer which keeps a copy of everything written, up to limit bytes """
+
+    transport = None  # hidden, so sendfile() writes through this writer
+
+    def __init__(self, writer, limit):
+        self.writer = writer
+        self.limit = limit
+        self.chunks = []  # None if more than limit bytes were written
+        self.size = 0
+
+    def write(self, data):
+        self.writer.write(data)
+        if self.chunks is not None:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            self.size += len(data)
+            if self.size > self.limit:
+                self.chunks = None
+            else:
+                self.chunks.append(bytes(data))  # caller may reuse its buffer
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+
+class _Flight:
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.response = None  # bytes written by the handler, None if not available
+        self.result = None
+        self.waiters = 0
+
+
+class SingleFlight:
+
+    def __init__(self, key=None, timeout=10, limit=8192):
+        """ Create a single-flight policy for a route
+
+        :param callable key: function which returns the key for a request, default (method, url)
+        :param int timeout: seconds a request waits for the running handler
+        :param int limit: maximum size in bytes of a response shared with waiters
+        """
+        self.key = key
+        self.timeout = timeout
+        self.limit = limit
+        self.executions = 0
+        self.coalesced = 0  # requests answered with the response of another request
+        self.failed = 0  # waiters answered with 503
+        self._flights = dict()  # key -> _Flight in progress
+
+    def handler(self, func):
+        """ Return an async handler which runs func once for concurrent requests with the same key """
+
+        async def run(reader, writer, request):
+            key = (request.method, request.url) if self.key is None else self.key(request)
+
+            flight = self._flights.get(key)
+            if flight is not None:  # handler already running, wait for its response
+                flight.waiters += 1
+                try:
+                    await asyncio.wait_for(flight.event.wait(), self.timeout)
+                except asyncio.TimeoutError:
+                    pass
+                flight.waiters -= 1
+                if flight.response is None:
+                    self.failed += 1
+                    response = HTTPResponse(503, "text/plain", close=True, header={"Retry-After": 1})
+                    await response.send(writer)
+                    return
+                self.coalesced += 1
+                writer.write(flight.response)
+                return flight.result
+
+            flight = _Flight()
+            self._flights[key] = flight
+            self.executions += 1
+            capture = CaptureWriter(writer, self.limit)
+            try:
+                flight.result = await func(reader, capture, request)
+                if capture.chunks is not None:
+                    flight.response = b"".join(capture.chunks)
+            finally:
+                del self._flights[key]
+                flight.event.set()
+            return flight.result
+
+        return run
+
+    def stats(self):
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "in_flight": len(self._flights),
+            "waiting": sum(flight.waiters for flight in self._flights.values())
+        }
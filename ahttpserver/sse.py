@@ -6,7 +6,7 @@
 #
 #   from ahttpserver.sse import EventSource
 #
-#   @app.route("GET", "/api/greeting")
+#   @app.route("GET", "/api/greeting", streaming=True)
 #   async def api_greeting(reader, writer, request):
 #       # Say hello every 5 seconds
 #       eventsource = await EventSource(reader, writer)
@@ -49,12 +49,16 @@ class EventSource:
         :param str event: optional event type, used for dispatching at client
         :param int retry: retry interval in milliseconds
         """
-        writer = self.writer
+        lines = []
         if id is not None:
-            writer.write(f"id: {id}\n")
+            lines.append(f"id: {id}\n")
         if event is not None:
-            writer.write(f"event: {event}\n")
+            lines.append(f"event: {event}\n")
         if retry is not None:
-            writer.write(f"retry: {retry}\n")
-        writer.write(f"data: {data}\n\n")
-        await writer.drain()
+            lines.append(f"retry: {retry}\n")
+        lines.append(f"data: {data}\n\n")
+        self.writer.write("".join(lines).encode("utf-8"))
+        if hasattr(self.writer, "flush"):  # BufferedWriter
+            await self.writer.flush()
+        else:
+            await self.writer.drain()
@@ -0,0 +1,106 @@
+# TLS (HTTPS) support
+#
+# Usage:
+#
+#   from ahttpserver import HTTPServer
+#   from ahttpserver.tls import TLS
+#
+#   app = HTTPServer(port=443, tls=TLS("cert.pem", "key.pem"))
+#
+# A self-signed certificate for testing can be created with:
+#
+#   openssl req -x509 -newkey rsa:2048 -nodes -days 365 -subj "/CN=localhost" \
+#       -keyout key.pem -out cert.pem
+#
+# A full handshake is expensive, on an ESP32 it takes seconds. To limit the
+# number of handshakes:
+# - All connections share one SSL context, so its session cache and session
+#   tickets let returning clients resume a previous session (supported on
+#   CPython, MicroPython's mbedtls server does not resume sessions).
+# - Handlers which return CONNECTION_KEEP_ALIVE keep the connection, and thus
+#   the TLS session, open for the next request.
+# Handshake counts and durations are available via stats(). Durations are
+# only measured on CPython. On MicroPython the handshake is performed by the
+# first read from the stream, so only counts are kept.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+try:
+    import ssl
+except ImportError:
+    import ussl as ssl
+
+from .ticks import ticks_diff, ticks_ms
+
+
+class TLS:
+
+    def __init__(self, certfile, keyfile, session_cache=True):
+        """ Create the SSL context shared by all connections
+
+        :param str certfile: name of file with the server certificate (chain)
+        :param str keyfile: name of file with the private key
+        :param bool session_cache: if true allow clients to resume sessions
+        """
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.context.load_cert_chain(certfile, keyfile)
+        if not session_cache:
+            if hasattr(ssl, "OP_NO_TICKET"):
+                self.context.options |= ssl.OP_NO_TICKET
+            if hasattr(self.context, "num_tickets"):
+                self.context.num_tickets = 0
+        self.handshakes = 0
+        self.resumed = 0
+        self.failed = 0
+        self._handshake_ms = 0  # total
+        self._max_handshake_ms = 0
+        self._timed = hasattr(ssl, "SSLObject")
+        if self._timed:  # CPython, asyncio drives the handshake via SSLObject
+            self.context.sslobject_class = _timed_sslobject(self)
+
+    def established(self):
+        """ Called by the server after the first request was read from a new connection """
+        if not self._timed:
+            self.handshakes += 1
+
+    def _record(self, sslobj, ms):
+        self.handshakes += 1
+        if sslobj.session_reused:
+            self.resumed += 1
+        self._handshake_ms += ms
+        if ms > self._max_handshake_ms:
+            self._max_handshake_ms = ms
+
+    def stats(self):
+        stats = {
+            "handshakes": self.handshakes,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "avg_handshake_ms": self._handshake_ms // self.handshakes if self._timed and self.handshakes else 0,
+            "max_handshake_ms": self._max_handshake_ms
+        }
+        if hasattr(self.context, "session_stats"):  # CPython
+            stats["session_cache"] = self.context.session_stats()
+        return stats
+
+
+def _timed_sslobject(tls):
+    """ Return an SSLObject class which reports handshake duration and outcome to tls """
+
+    class TimedSSLObject(ssl.SSLObject):
+
+        def do_handshake(self):
+            # called repeatedly, raises SSLWantReadError until the handshake is complete
+            if not hasattr(self, "_start"):
+                self._start = ticks_ms()
+            try:
+                super().do_handshake()
+            except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                raise
+            except ssl.SSLError:
+                tls.failed += 1
+                raise
+            tls._record(self, ticks_diff(ticks_ms(), self._start))
+
+    return TimedSSLObject
@@ -0,0 +1,232 @@
+# Run blocking handlers on worker threads
+#
+# Usage:
+#
+#   from ahttpserver import HTTPResponse, HTTPServer
+#   from ahttpserver.workers import WorkerPool
+#
+#   app = HTTPServer(workers=WorkerPool(size=2, queue=4))
+#
+#   @app.route("GET", "/api/sensor", blocking=True)
+#   def api_sensor(writer, request):
+#       value = read_sensor()  # blocks, but only this worker thread
+#       response = HTTPResponse(200, "application/json", close=True)
+#       writer.write(response.encode())
+#       writer.write(json.dumps(value))
+#
+# A handler which is declared as blocking is a plain function, not a
+# coroutine. It runs on one of 'size' worker threads, so flash writes, I2C
+# reads or long computations do not freeze the event loop and thereby all
+# other connections. The handler receives a writer and the request (like a
+# handler of httpserver). Everything written is handed over to the event
+# loop, which sends it to the client while the handler continues.
+# At most 'queue' requests wait for a free worker; when the queue is full the
+# request is answered with 503 Service Unavailable.
+# When the client disconnects, write() raises OSError in the handler, as it
+# does when the client does not read what was written for 'timeout' seconds.
+# Worker threads use _thread, on CPython as well as on MicroPython. Completion
+# and writes are signalled to the event loop with asyncio.ThreadSafeFlag.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import _thread
+import errno
+import time
+
+try:
+    import uasyncio as asyncio
+except ImportError:  # CPython
+    import asyncio
+
+from .response import HTTPResponse
+from .ticks import ticks_diff, ticks_ms
+from .url import HTTPRequest
+
+try:
+    ThreadSafeFlag = asyncio.ThreadSafeFlag
+except AttributeError:  # CPython
+    class ThreadSafeFlag:
+        """ Minimal CPython version of MicroPython's asyncio.ThreadSafeFlag """
+
+        def __init__(self):
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+
+        def set(self):
+            self._loop.call_soon_threadsafe(self._event.set)
+
+        async def wait(self):
+            await self._event.wait()
+            self._event.clear()
+
+
+class ThreadWriter:
+    """ Writer for a handler on a worker thread. The data is sent by the event loop. """
+
+    def __init__(self, flag, limit, timeout):
+        self.limit = limit  # bytes waiting to be sent before write() blocks
+        self.timeout = timeout  # seconds write() blocks before it fails
+        self.abandoned = False  # set when the response can no longer be sent
+        self._flag = flag
+        self._lock = _thread.allocate_lock()
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        else:
+            data = bytes(data)  # caller may reuse its buffer
+        start = ticks_ms()
+        while self._size > self.limit and not self.abandoned:  # wait for the event loop to catch up
+            if ticks_diff(ticks_ms(), start) > self.timeout * 1000:
+                raise OSError(errno.ETIMEDOUT)
+            time.sleep(0.01)
+        if self.abandoned:
+            raise OSError(errno.ECONNRESET)
+        with self._lock:
+            self._chunks.append(data)
+            self._size += len(data)
+        self._flag.set()
+
+    def _take(self):
+        """ Remove and return all chunks written so far """
+        with self._lock:
+            chunks = self._chunks
+            self._chunks = []
+            self._size = 0
+        return chunks
+
+    def abandon(self):
+        """ Called by the event loop when the client is gone, later writes fail """
+        self.abandoned = True
+        self._take()
+
+
+class _Job:
+
+    def __init__(self, func, writer, request, flag):
+        self.func = func
+        self.writer = writer
+        self.request = request
+        self.flag = flag
+        self.done = False
+        self.result = None
+        self.exception = None
+
+
+class WorkerPool:
+
+    def __init__(self, size=2, queue=4, limit=4096, timeout=30):
+        """ Create a pool of worker threads, threads are started on first use
+
+        :param int size: number of worker threads
+        :param int queue: maximum number of requests waiting for a worker
+        :param int limit: bytes a handler may write ahead of the event loop
+        :param int timeout: seconds a write may wait for the event loop before it fails
+        """
+        self.size = size
+        self.queue = queue
+        self.limit = limit
+        self.timeout = timeout
+        self.busy = 0
+        self.completed = 0
+        self.rejected = 0
+        self._jobs = []
+        self._mutex = _thread.allocate_lock()
+        self._wake = _thread.allocate_lock()  # released when there is work
+        self._wake.acquire()
+        self._started = False
+
+    def _worker(self):
+        while True:
+            self._wake.acquire()
+            with self._mutex:
+                job = self._jobs.pop(0) if self._jobs else None
+                if self._jobs:  # more work, wake another worker
+                    self._wake.release()
+                if job is None:
+                    continue
+                self.busy += 1
+
+            try:
+                job.result = job.func(job.writer, job.request)
+            except Exception as e:  # re-raised on the event loop
+                job.exception = e
+
+            with self._mutex:
+                self.busy -= 1
+                self.completed += 1
+            job.done = True
+            job.flag.set()
+
+    def _submit(self, job):
+        if not self._started:
+            for _ in range(self.size):
+                _thread.start_new_thread(self._worker, ())
+            self._started = True
+        with self._mutex:
+            self._jobs.append(job)
+            if self._wake.locked():
+                self._wake.release()
+
+    def handler(self, func):
+        """ Return an async handler which runs blocking handler func on the pool """
+
+        async def run(reader, writer, request):
+            if len(self._jobs) + self.busy >= self.size + self.queue:  # all workers busy and the queue full
+                self.rejected += 1
+                response = HTTPResponse(503, "text/plain", close=True, header={"Retry-After": 1})
+                await response.send(writer)
+                return
+
+            flag = ThreadSafeFlag()
+            # the server reuses request when this coroutine ends, which may be before the job
+            job = _Job(func, ThreadWriter(flag, self.limit, self.timeout), _copy(request), flag)
+            self._submit(job)
+
+            try:
+                while not job.done:
+                    await flag.wait()
+                    await self._relay(job.writer, writer)
+                await self._relay(job.writer, writer)  # written just before done was set
+            finally:
+                if not job.done:  # client gone or cancelled, let the handler's writes fail
+                    job.writer.abandon()
+
+            if job.exception is not None:
+                raise job.exception
+            return job.result
+
+        return run
+
+    @staticmethod
+    async def _relay(source, writer):
+        chunks = source._take()
+        if chunks:
+            for chunk in chunks:
+                writer.write(chunk)
+            await writer.flush()  # send now, not when the buffer is full or the handler ends
+
+    def stats(self):
+        return {
+            "workers": self.size,
+            "busy": self.busy,
+            "queued": len(self._jobs),
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+
+def _copy(request):
+    """ Return a copy of request for use on a worker thread """
+    copy = HTTPRequest()
+    copy.method = request.method
+    copy.url = request.url
+    copy.version = request.version
+    copy.path = request.path
+    copy.query = request.query
+    copy.parameters.update(request.parameters)
+    copy.header.update(request.header)
+    return copy
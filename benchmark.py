@@ -0,0 +1,135 @@
+# Micro benchmarks for the request path
+#
+# Usage (on the board or with CPython):
+#
+#   import benchmark
+#   benchmark.run()
+#
+# or 'python benchmark.py' on the host.
+#
+# Every benchmark runs a part of request handling 'n' times and prints the
+# time per iteration and, on MicroPython, the bytes allocated per iteration
+# (garbage collection is disabled while measuring so gc.mem_alloc() shows all
+# allocations).
+# On CPython the throughput of sending a 1 MB file over a local connection is
+# measured as well, for chunked copying and for sendfile().
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import gc
+
+from ahttpserver.ticks import ticks_diff, ticks_ms
+from ahttpserver.url import HTTPRequest, RequestPool
+
+_micropython = hasattr(gc, "mem_alloc")
+
+request_lines = [b"GET / HTTP/1.1\r\n",
+                 b"GET /api/date HTTP/1.1\r\n",
+                 b"GET /page?key1=0.07&key2=0.03&key3=0.13 HTTP/1.1\r\n",
+                 b"POST /api/stop HTTP/1.0\r\n"]
+
+header = [(b"Host", b"192.168.178.20"), (b"Accept", b"*/*"), (b"Connection", b"close")]
+
+
+def request_new():
+    """ A new request object for every request """
+    for line in request_lines:
+        request = HTTPRequest(line)
+        for name, value in header:
+            request.header[name] = value
+
+
+pool = RequestPool()
+
+
+def request_pooled():
+    """ Request objects from a pool """
+    for line in request_lines:
+        request = pool.acquire(line)
+        for name, value in header:
+            request.header[name] = value
+        pool.release(request)
+
+
+def measure(func, n):
+    """ Return (microseconds, bytes allocated or None) per call of func """
+    func()  # warm up, fills the pool
+    gc.collect()
+    gc.disable()
+    try:
+        allocated = gc.mem_alloc() if _micropython else 0
+        start = ticks_ms()
+        for _ in range(n):
+            func()
+        elapsed = ticks_diff(ticks_ms(), start)
+        allocated = (gc.mem_alloc() - allocated) // n if _micropython else None
+    finally:
+        gc.enable()
+    return elapsed * 1000 // n, allocated
+
+
+def throughput(size=1048576, n=20, port=8765):
+    """ Print MB/s for sending a file of size bytes n times, chunked and via sendfile() (CPython only) """
+    import asyncio
+    import os
+    import tempfile
+
+    from ahttpserver import HTTPResponse, HTTPServer
+    from ahttpserver.sendfile import _send_buffered, sendfile
+
+    fd, filename = tempfile.mkstemp()
+    os.write(fd, os.urandom(size))
+    os.close(fd)
+
+    app = HTTPServer(host="127.0.0.1", port=port)
+
+    @app.route("GET", "/buffered")
+    async def buffered(reader, writer, request):
+        await HTTPResponse(200, "application/octet-stream").send(writer)
+        with open(filename, "rb") as fp:
+            await _send_buffered(writer, fp)
+
+    @app.route("GET", "/sendfile")
+    async def zerocopy(reader, writer, request):
+        await HTTPResponse(200, "application/octet-stream").send(writer)
+        await sendfile(writer, filename)
+
+    async def download(path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\n\r\n".encode())
+        received = 0
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            received += len(data)
+        writer.close()
+        return received
+
+    async def main():
+        await app.start()
+        for path in ("/buffered", "/sendfile"):
+            start = ticks_ms()
+            for _ in range(n):
+                await download(path)
+            elapsed = ticks_diff(ticks_ms(), start)
+            print(f"{path[1:]:<16} {size * n // 1000 // max(elapsed, 1):>6} MB/s")
+        await app.stop()
+
+    try:
+        asyncio.run(main())
+    finally:
+        os.remove(filename)
+
+
+def run(n=1000):
+    for func in (request_new, request_pooled):
+        us, allocated = measure(func, n)
+        print(f"{func.__name__:<16} {us:>6} us", f"{allocated:>6} bytes" if allocated is not None else "")
+    if not _micropython:
+        throughput()
+
+
+if __name__ == "__main__":
+    run()
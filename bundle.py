@@ -0,0 +1,97 @@
+# Pack a web-root directory into a Python module of bytes constants
+#
+# Usage (on the host, with CPython):
+#
+#   python bundle.py www assets.py
+#
+# Every file below 'www' becomes an entry in dict ASSETS in 'assets.py',
+# keyed by its URL path ("/css/style.css"). An index.html is also served as
+# its directory ("/"). Each entry is a tuple:
+#
+#   (mime type, ETag, content, gzip compressed content or None)
+#
+# The compressed variant is only included for compressible types and when
+# it is noticeably smaller. Freeze assets.py into the firmware so the bytes
+# stay in flash (ROM) instead of being loaded into RAM, and serve them with
+# mount() from ahttpserver.assets or httpserver.assets:
+#
+#   import assets
+#   from ahttpserver.assets import mount
+#
+#   mount(app, assets.ASSETS)
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import gzip
+import os
+import sys
+import zlib
+
+mimetypes = {
+    ".css": "text/css",
+    ".csv": "text/csv",
+    ".gif": "image/gif",
+    ".htm": "text/html",
+    ".html": "text/html",
+    ".ico": "image/x-icon",
+    ".jpeg": "image/jpeg",
+    ".jpg": "image/jpeg",
+    ".js": "text/javascript",
+    ".json": "application/json",
+    ".png": "image/png",
+    ".svg": "image/svg+xml",
+    ".txt": "text/plain",
+    ".woff2": "font/woff2",
+    ".xml": "application/xml"
+}
+
+compressible = ("text/", "application/json", "application/xml", "image/svg+xml", "image/x-icon")
+
+
+def bundle(root, output):
+    assets = []  # (url paths, mime type, etag, content, compressed)
+    for directory, _, files in sorted(os.walk(root)):
+        for name in sorted(files):
+            filename = os.path.join(directory, name)
+            with open(filename, "rb") as fp:
+                content = fp.read()
+
+            path = "/" + os.path.relpath(filename, root).replace(os.sep, "/")
+            paths = [path]
+            if name == "index.html":
+                paths.append(path[:-len("index.html")])
+
+            mimetype = mimetypes.get(os.path.splitext(name)[1].lower(), "application/octet-stream")
+            etag = f'"{zlib.crc32(content):08x}"'
+
+            compressed = None
+            if mimetype.startswith(compressible):
+                compressed = gzip.compress(content, 9, mtime=0)
+                if len(compressed) > len(content) * 0.9:  # not worth it
+                    compressed = None
+
+            assets.append((paths, mimetype, etag, content, compressed))
+
+    with open(output, "w") as fp:
+        fp.write(f"# Generated by bundle.py from {root}, do not edit\n\n")
+        for i, (paths, mimetype, etag, content, compressed) in enumerate(assets):
+            fp.write(f"_{i} = ({mimetype.encode()!r}, {etag.encode()!r},\n")
+            fp.write(f"      {content!r},\n")
+            fp.write(f"      {compressed!r})\n")
+        fp.write("\nASSETS = {\n")
+        for i, (paths, *_) in enumerate(assets):
+            for path in paths:
+                fp.write(f"    {path!r}: _{i},\n")
+        fp.write("}\n")
+
+    for paths, mimetype, etag, content, compressed in assets:
+        gz = f", gzip {len(compressed)}" if compressed else ""
+        print(f"{paths[0]}: {mimetype}, {len(content)} bytes{gz}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python bundle.py webroot module.py")
+        sys.exit(1)
+    bundle(sys.argv[1], sys.argv[2])
@@ -0,0 +1,76 @@
+# Serve static files from an asset bundle instead of the filesystem
+#
+# Usage:
+#
+#   import assets  # created with bundle.py, preferably frozen into the firmware
+#   from httpserver.assets import mount
+#
+#   mount(app, assets.ASSETS)  # serves "/", "/index.html", "/favicon.ico", ...
+#
+# mount() registers a GET route for every asset in the bundle. The content is
+# sent straight from the bytes constant via a memoryview, so there is no file
+# I/O, and when the bundle is frozen no copy of the file in RAM.
+# The precomputed ETag lets a client revalidate its cache with If-None-Match
+# (answered by 304 Not Modified), and the gzip variant is sent to clients
+# which accept it.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+from .compress import acceptable
+
+def mount(app, assets, prefix=""):
+    """ Register a GET route for every asset
+
+    :param HTTPServer app: server to add the routes to
+    :param dict assets: ASSETS dict from a module created by bundle.py
+    :param str prefix: path to put in front of the asset paths, like "/static"
+    """
+    handlers = dict()  # assets served under two paths (like index.html) share a handler
+    for path, asset in assets.items():
+        handler = handlers.get(id(asset))
+        if handler is None:
+            handler = _handler(asset)
+            handlers[id(asset)] = handler
+        app.route("GET", prefix + path)(handler)
+
+
+def _header(mimetype, etag, length, encoding=None, vary=False):
+    header = b"HTTP/1.1 200 OK\r\nContent-Type: " + mimetype + \
+             b"\r\nContent-Length: " + str(length).encode() + \
+             b"\r\nETag: " + etag + b"\r\nConnection: close\r\n"
+    if encoding is not None:
+        header += b"Content-Encoding: " + encoding + b"\r\n"
+    if vary:  # the response depends on Accept-Encoding, also when it is not compressed
+        header += b"Vary: Accept-Encoding\r\n"
+    return header + b"\r\n"
+
+
+def _handler(asset):
+    mimetype, etag, content, compressed = asset
+    vary = compressed is not None
+    header = _header(mimetype, etag, len(content), vary=vary)
+    compressed_etag = etag[:-1] + b'-gzip"'  # each representation has its own ETag
+    if vary:
+        compressed_header = _header(mimetype, compressed_etag, len(compressed), b"gzip", vary)
+    not_modified = b"\r\nConnection: close\r\n" + (b"Vary: Accept-Encoding\r\n\r\n" if vary else b"\r\n")
+
+    def send_asset(conn, request):
+        match = request.header.get(b"If-None-Match")
+        if match == etag or (vary and match == compressed_etag):
+            conn.write(b"HTTP/1.1 304 Not Modified\r\nETag: " + match + not_modified)
+            return
+
+        if vary and b"gzip" in acceptable(request):
+            conn.write(compressed_header)
+            data = memoryview(compressed)
+        else:
+            conn.write(header)
+            data = memoryview(content)
+
+        if getattr(conn, "discard_body", False):  # response to HEAD request
+            return
+
+        conn.write(data)
+
+    return send_asset
@@ -0,0 +1,66 @@
+# Write buffering for connections
+#
+# Every write() on a socket can become a TCP segment of its own. A response
+# written in many small parts (status line, header fields, body) then takes
+# several packets, and may wait for Nagle's algorithm and delayed ACKs.
+# The server hands a BufferedConnection to the handler instead of the socket.
+# It gathers writes in a buffer which is sent when:
+# - the next write does not fit anymore (larger data is written directly)
+# - flush() is called, do so when data must reach the client now (like an
+#   event on an event stream)
+# - the handler returns
+# When the handler keeps the connection alive the buffer goes back to the
+# server and later writes go directly to the socket.
+# Other attributes are taken from the wrapped connection.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+
+class BufferedConnection:
+
+    def __init__(self, conn, buffer):
+        """ :param socket conn: connection to write to
+            :param bytearray buffer: buffer to gather writes in, reused for later connections
+        """
+        self.conn = conn
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._length = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if self._buffer is None:  # detached
+            self.conn.write(data)
+            return
+        n = len(data)
+        if self._length + n > len(self._buffer):
+            self.flush()
+            if n >= len(self._buffer):
+                self.conn.write(data)
+                return
+        self._buffer[self._length:self._length + n] = data
+        self._length += n
+
+    def flush(self):
+        """ Send what is in the buffer """
+        if self._length > 0:
+            self.conn.write(self._view[:self._length])
+            self._length = 0
+
+    def detach(self):
+        """ Flush and stop using the buffer, later writes go directly to the connection """
+        self.flush()
+        self._buffer = None
+        self._view = None
+
+    def close(self):
+        try:
+            self.flush()
+        except OSError:  # client gone, nothing more to send
+            pass
+        self.conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
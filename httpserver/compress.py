@@ -0,0 +1,219 @@
+# Compress dynamic responses on the fly
+#
+# Usage:
+#
+#   from httpserver.compress import CompressedStream
+#
+#   @app.route("GET", "/api/log.csv")
+#   def api_log(conn, request):
+#       stream = CompressedStream(conn, request, "text/csv")
+#       for row in sensor_log():
+#           stream.write(row)
+#       stream.close()
+#
+# CompressedStream sends the response header and body. The body is gzip or
+# deflate compressed when the client accepts it (Accept-Encoding) and sent
+# with chunked transfer-encoding, so the length need not be known up front.
+# HTTP/1.0 clients do not know chunked transfer-encoding, their response
+# body ends when the connection is closed.
+# RAM use is bounded by the window of 2 ** wbits bytes (default 1 KB) plus
+# the compressor state; a larger window compresses better.
+# Nothing is compressed when:
+# - the body is smaller than 'minimum' bytes: it is sent with Content-Length
+# - the mime type is already compressed (like image/jpeg or application/zip)
+# - this MicroPython port has no deflate compression (deflate module in
+#   v1.21 and later, if enabled), then the body is sent chunked as is
+# On CPython zlib is used instead of deflate.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import io
+
+from .response import HTTPResponse
+
+try:
+    import zlib
+    _compressobj = zlib.compressobj
+except (ImportError, AttributeError):  # MicroPython
+    _compressobj = None
+
+try:
+    import deflate
+    if not hasattr(deflate.DeflateIO, "write"):  # port without compression
+        deflate = None
+except ImportError:  # CPython or older MicroPython
+    deflate = None
+
+_MEMLEVEL = 2  # zlib internal state of 2 ** (memlevel + 9) bytes, default is 8
+
+# mime types which are compressed already
+_COMPRESSED = ("image/jpeg", "image/png", "image/gif", "image/webp", "audio/", "video/",
+               "application/zip", "application/gzip", "font/woff")
+
+
+class _Sink(getattr(io, "IOBase", object)):
+    """ Stream which collects the output of deflate.DeflateIO """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _Deflate:
+    """ deflate.DeflateIO with the interface of zlib.compressobj """
+
+    def __init__(self, encoding, wbits):
+        self._sink = _Sink()
+        self._stream = deflate.DeflateIO(self._sink, deflate.GZIP if encoding == "gzip" else deflate.ZLIB, wbits)
+
+    def compress(self, data):
+        self._stream.write(data)
+        return self._sink.take()
+
+    def flush(self):
+        self._stream.close()  # the sink is not closed
+        return self._sink.take()
+
+
+def _compressor(encoding, level, wbits):
+    if _compressobj is not None:
+        return _compressobj(level, zlib.DEFLATED, wbits + 16 if encoding == "gzip" else wbits, _MEMLEVEL)
+    return _Deflate(encoding, wbits)
+
+
+def compressible(mimetype):
+    """ Return True if a body of this mime type can be compressed here
+
+    :param str mimetype: mime type of the response
+    """
+    if _compressobj is None and deflate is None:
+        return False
+    for compressed in _COMPRESSED:
+        if mimetype.startswith(compressed):
+            return False
+    return True
+
+
+def acceptable(request):
+    """ Return the content codings the client accepts, as lowercase bytes like b"gzip"
+
+    :param HTTPRequest request: request with the Accept-Encoding header field
+    """
+    accepted = []
+    for coding in request.header.get(b"Accept-Encoding", b"").split(b","):
+        parameters = coding.split(b";")
+        quality = 1
+        for parameter in parameters[1:]:
+            parameter = parameter.strip()
+            if parameter.startswith(b"q="):
+                try:
+                    quality = float(parameter[2:].decode("utf-8"))
+                except ValueError:
+                    quality = 0
+        if quality > 0:  # q=0 means not acceptable
+            accepted.append(parameters[0].strip().lower())
+    return accepted
+
+
+def negotiate(request, mimetype):
+    """ Return the content coding to use, "gzip", "deflate" or None
+
+    :param HTTPRequest request: request with the Accept-Encoding header field
+    :param str mimetype: mime type of the response
+    """
+    if not compressible(mimetype):
+        return None
+    accepted = acceptable(request)
+    for coding in ("gzip", "deflate"):
+        if coding.encode() in accepted:
+            return coding
+    return None
+
+
+class CompressedStream:
+
+    def __init__(self, conn, request, mimetype, status=200, header=None, minimum=512, level=6, wbits=10):
+        """ Create a response whose body is compressed if possible
+
+        :param socket conn: connection to send the response to
+        :param HTTPRequest request: the request, for the Accept-Encoding header field
+        :param str mimetype: mime type of the body
+        :param int status: HTTP status code
+        :param dict header: additional header fields
+        :param int minimum: do not compress bodies smaller than this number of bytes
+        :param int level: compression level 1 (fastest) to 9 (smallest), CPython only
+        :param int wbits: window size is 2 ** wbits bytes, 9 to 15
+        """
+        self.conn = conn
+        self.mimetype = mimetype
+        self.status = status
+        self.header = dict() if header is None else header
+        self.minimum = minimum
+        self.level = level
+        self.wbits = wbits
+        self.encoding = negotiate(request, mimetype)
+        self.chunked = request.version != "1.0"  # else the body ends when the connection closes
+        if compressible(mimetype):  # the response depends on Accept-Encoding, also when not compressed
+            self.header["Vary"] = "Accept-Encoding"
+        self.sent = 0  # body bytes written to the connection, after compression
+        self._held = []  # data written before it was decided whether to compress
+        self._size = 0
+        self._started = False
+        self._compressor = None
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not self._started:
+            self._held.append(data)
+            self._size += len(data)
+            if self._size < self.minimum:
+                return
+            self._start()
+            data = b"".join(self._held)
+            self._held = None
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        self._chunk(data)
+
+    def close(self):
+        """ Send the rest of the body, the connection is not closed """
+        if not self._started:  # small body, send as is
+            data = b"".join(self._held)
+            self.header["Content-Length"] = len(data)
+            HTTPResponse(self.status, self.mimetype, header=self.header).send(self.conn)
+            self.conn.write(data)
+            self.sent = len(data)
+            return
+        if self._compressor is not None:
+            self._chunk(self._compressor.flush())
+        if self.chunked:
+            self.conn.write(b"0\r\n\r\n")
+
+    def _start(self):
+        self._started = True
+        if self.encoding is not None:
+            self._compressor = _compressor(self.encoding, self.level, self.wbits)
+            self.header["Content-Encoding"] = self.encoding
+        if self.chunked:
+            self.header["Transfer-Encoding"] = "chunked"
+        HTTPResponse(self.status, self.mimetype, header=self.header).send(self.conn)
+
+    def _chunk(self, data):
+        if data:
+            if self.chunked:
+                self.conn.write(f"{len(data):x}\r\n".encode("utf-8"))
+                self.conn.write(data)
+                self.conn.write(b"\r\n")
+            else:
+                self.conn.write(data)
+            self.sent += len(data)
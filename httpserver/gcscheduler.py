@@ -0,0 +1,110 @@
+# Garbage collection scheduler
+#
+# Usage:
+#
+#   from httpserver import HTTPServer
+#   from httpserver.gcscheduler import GCScheduler
+#
+#   app = HTTPServer(gcscheduler=GCScheduler())
+#
+# A garbage collection takes 10 to 50 ms on a typical board. When it is
+# triggered by an allocation in the middle of handling a request that
+# request is delayed. The scheduler lets the server collect in between
+# requests instead:
+# - after a request, when enough has been allocated since the last collection
+# - before admitting a request if free heap dropped below 'watermark'
+# After every collection gc.threshold() is set so that at least 'headroom'
+# requests, of the observed average allocation, fit before MicroPython
+# starts an automatic collection.
+# On CPython, which has no gc.mem_alloc(), automatic collection stays enabled
+# and the scheduler does not collect (a full collection after every request
+# would cost more than it saves).
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import gc
+
+from .ticks import ticks_diff, ticks_ms
+
+_micropython = hasattr(gc, "mem_alloc")
+
+
+class GCScheduler:
+
+    def __init__(self, watermark=8192, headroom=4):
+        """ Create a garbage collection scheduler
+
+        :param int watermark: collect before a request when less bytes are free
+        :param int headroom: number of requests which must fit before an automatic collection
+        """
+        self.watermark = watermark
+        self.headroom = headroom
+        self.active = 0  # requests in flight
+        self.collections = 0
+        self.forced = 0  # collections because of low memory
+        self.per_request = 0  # average bytes allocated per request
+        self.threshold = 0  # last value passed to gc.threshold()
+        self._requests = 0  # since last collection
+        self._base = 0  # bytes allocated after last collection
+        self._pause_ms = 0  # total
+        self._max_pause_ms = 0
+        if _micropython:
+            self._base = gc.mem_alloc()
+
+    def admit(self):
+        """ Called before a request is handled """
+        if _micropython and gc.mem_free() < self.watermark:
+            self.forced += 1
+            self.collect()
+        self.active += 1
+        self._requests += 1
+
+    def release(self):
+        """ Called when handling a request is finished """
+        self.active -= 1
+        if self.active == 0:
+            self.idle()
+
+    def idle(self):
+        """ Collect if enough was allocated since the last collection. Call only when no request is in flight """
+        if self._requests == 0 or not _micropython:  # CPython collects automatically
+            return
+        if gc.mem_alloc() - self._base < self.threshold // 2:
+            return
+        self.collect()
+
+    def collect(self):
+        allocated = gc.mem_alloc() - self._base if _micropython else 0
+
+        start = ticks_ms()
+        gc.collect()
+        pause = ticks_diff(ticks_ms(), start)
+
+        self.collections += 1
+        self._pause_ms += pause
+        if pause > self._max_pause_ms:
+            self._max_pause_ms = pause
+
+        if _micropython:
+            if self._requests > 0:
+                if self.per_request == 0:
+                    self.per_request = allocated // self._requests
+                else:  # moving average
+                    self.per_request = (3 * self.per_request + allocated // self._requests) // 4
+            free = gc.mem_free()
+            self.threshold = max(1024, min(free - self.watermark, max(self.per_request * self.headroom, free // 4)))
+            gc.threshold(self.threshold)
+            self._base = gc.mem_alloc()
+
+        self._requests = 0
+
+    def stats(self):
+        return {
+            "collections": self.collections,
+            "forced": self.forced,
+            "avg_pause_ms": self._pause_ms // self.collections if self.collections else 0,
+            "max_pause_ms": self._max_pause_ms,
+            "per_request": self.per_request,
+            "threshold": self.threshold
+        }
@@ -0,0 +1,139 @@
+# Heap allocation profiler for the request path
+#
+# Usage:
+#
+#   from httpserver import HTTPServer
+#   from httpserver.profiler import Profiler
+#
+#   app = HTTPServer(profiler=Profiler())
+#
+#   @app.route("GET", "/debug/memory")
+#   def memory(conn, request):
+#       app.profiler.print_summary()  # or send app.profiler.summary() as json
+#
+# In profiling mode the server samples the heap at the end of every stage
+# of handling a request:
+#
+#   request  reading and parsing the request line
+#   header   reading the header fields
+#   route    looking up the handler
+#   handler  running the handler, which includes sending the response
+#
+# The bytes allocated in each stage are summed per route ("GET /path"),
+# requests without a route are collected under "404". On MicroPython the
+# heap is sampled with gc.mem_alloc(). A garbage collection during a request
+# makes memory appear to be released; such requests are counted under 'gc'
+# and left out of the totals. On CPython tracemalloc is used, and the number
+# of allocated objects is sampled too.
+# Threads started by handlers (like for server-sent events) allocate too, and
+# their allocations are attributed to the request being handled.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+import gc
+import sys
+
+try:
+    import tracemalloc
+except ImportError:  # MicroPython
+    tracemalloc = None
+
+STAGES = ("request", "header", "route", "handler")
+
+
+class Profiler:
+
+    def __init__(self):
+        self.routes = dict()  # route -> [requests, gc, [bytes per stage], [objects per stage]]
+        if tracemalloc is not None and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def _sample():
+        """ Return (bytes allocated, objects allocated) """
+        if tracemalloc is not None:
+            return tracemalloc.get_traced_memory()[0], sys.getallocatedblocks()
+        return gc.mem_alloc(), 0
+
+    def begin(self):
+        """ Start profiling a request, return the list to pass to mark() and end() """
+        return [self._sample()]
+
+    def mark(self, profile):
+        """ Mark the end of a stage """
+        profile.append(self._sample())
+
+    def end(self, profile, request, found=True):
+        """ Mark the end of the last stage and add the samples to the totals for the route
+
+        :param list profile: as returned by begin()
+        :param HTTPRequest request: the request
+        :param bool found: false if no route was found for the request
+        """
+        profile.append(self._sample())
+        if len(profile) != len(STAGES) + 1:  # request did not pass through all stages
+            return
+
+        route = f"{request.method} {request.path}" if found else "404"
+
+        totals = self.routes.get(route)
+        if totals is None:
+            totals = [0, 0, [0] * len(STAGES), [0] * len(STAGES)]
+            self.routes[route] = totals
+
+        deltas = [(profile[i + 1][0] - profile[i][0], profile[i + 1][1] - profile[i][1]) for i in range(len(STAGES))]
+        if tracemalloc is None and min(delta[0] for delta in deltas) < 0:  # garbage collected
+            totals[1] += 1
+            return
+
+        totals[0] += 1
+        for i, (nbytes, objects) in enumerate(deltas):
+            totals[2][i] += nbytes
+            totals[3][i] += objects
+
+    def reset(self):
+        self.routes.clear()
+
+    def summary(self):
+        """ Return average allocation per stage per route, plus heap status """
+        routes = dict()
+        for route, (requests, collected, nbytes, objects) in self.routes.items():
+            n = max(requests, 1)
+            routes[route] = {
+                "requests": requests,
+                "gc": collected,
+                "bytes": dict(zip(STAGES, [b // n for b in nbytes])),
+                "objects": dict(zip(STAGES, [o // n for o in objects]))
+            }
+        summary = {"routes": routes}
+        if hasattr(gc, "mem_free"):  # MicroPython
+            summary["free"] = gc.mem_free()
+            summary["largest_free_block"] = _largest_free_block()
+        else:
+            summary["traced"], summary["peak"] = tracemalloc.get_traced_memory()
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"{'route':24} {'requests':>8} {'gc':>4} " + " ".join(f"{stage:>8}" for stage in STAGES))
+        for route, totals in summary["routes"].items():
+            print(f"{route:24} {totals['requests']:8} {totals['gc']:4} " +
+                  " ".join(f"{totals['bytes'][stage]:8}" for stage in STAGES))
+        for key, value in summary.items():
+            if key != "routes":
+                print(f"{key}: {value}")
+
+
+def _largest_free_block():
+    """ Find the largest block which can be allocated on the MicroPython heap, by trial """
+    low, high = 0, gc.mem_free()
+    while low < high:
+        size = (low + high + 1) // 2
+        try:
+            block = bytearray(size)
+            del block
+            low = size
+        except MemoryError:
+            high = size - 1
+    return low
@@ -13,6 +13,8 @@ def sendfile(conn, filename):
     :param socket conn: connection to send the file content to
     :param str filename: name of file the send
     """
+    if getattr(conn, "discard_body", False):  # response to HEAD request
+        return
     with open(filename, "rb") as fp:
         while True:
             n = fp.readinto(_buffer)
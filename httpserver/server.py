@@ -19,11 +19,16 @@
 # Every handler receives the connection socket and an object with all the
 # details from the request (see url.py for exact content). The handler must
 # construct and send a correct HTTP response. To avoid typos use the
-# HTTPResponse component from response.py.
+# HTTPResponse component from response.py. What the handler writes is
+# buffered (see buffered.py) and sent when the buffer is full, when the
+# handler calls conn.flush() or when it returns.
 # When leaving the handler the connection will be closed, unless the return
-# code of the handler is CONNECTION_KEEP_ALIVE.
+# code of the handler is CONNECTION_KEEP_ALIVE. Unless it does, the request
+# object is reused for the next request, so do not keep a reference to it.
 # Any (method, path) combination which has not been declared using @route
-# will, when received by the server, result in a 404 HTTP error.
+# will, when received by the server, result in a 404 HTTP error. Exceptions
+# are HEAD, which is answered by the GET handler for the path without sending
+# the body, and OPTIONS, which is answered from the registered routes.
 # The server cannot be stopped unless an alert is raised. A KeyboardInterrupt
 # will cause a controlled exit.
 #
@@ -34,12 +39,15 @@ import errno
 import socket
 from micropython import const
 
-from .response import HTTPResponse
-from .url import HTTPRequest, InvalidRequest
+from .buffered import BufferedConnection
+from .response import HTTPResponse, ResponseFilter
+from .url import InvalidRequest, RequestPool
 
 CONNECTION_CLOSE = const(0)
 CONNECTION_KEEP_ALIVE = const(1)
 
+_NODELAY = hasattr(socket, "IPPROTO_TCP") and hasattr(socket, "TCP_NODELAY")  # not on every port
+
 
 class HTTPServerError(Exception):
     pass
@@ -47,12 +55,21 @@ class HTTPServerError(Exception):
 
 class HTTPServer:
 
-    def __init__(self, host="0.0.0.0", port=80, backlog=5, timeout=30):
+    def __init__(self, host="0.0.0.0", port=80, backlog=5, timeout=30,
+                 ratelimiter=None, cors=None, tls=None, profiler=None, gcscheduler=None):
         self.host = host
         self.port = port
         self.backlog = backlog
         self.timeout = timeout
+        self.ratelimiter = ratelimiter  # optional ratelimit.RateLimiter
+        self.cors = cors  # optional cors.CORS policy
+        self.tls = tls  # optional tls.TLS configuration
+        self.profiler = profiler  # optional profiler.Profiler
+        self.gcscheduler = gcscheduler  # optional gcscheduler.GCScheduler
         self._routes = dict()  # stores link between (method, path) and function to execute
+        self._options_cache = dict()  # path -> (OPTIONS response, preflight header fields)
+        self._pool = RequestPool(1)  # request objects for reuse, one is handled at a time
+        self._buffer = bytearray(1024)  # for BufferedConnection, reused as one request is handled at a time
 
     def route(self, method="GET", path="/"):
         """ Decorator which connects method and path to the decorated function. """
@@ -62,9 +79,48 @@ class HTTPServer:
 
         def wrapper(function):
             self._routes[(method, path)] = function
+            self._options_cache.clear()
 
         return wrapper
 
+    @staticmethod
+    def _discard_header(conn):
+        """ Read and discard header fields """
+        while True:
+            line = conn.readline()
+            if line is None:
+                raise OSError(errno.ETIMEDOUT)
+            if line in [b"", b"\r\n"]:
+                break
+
+    def _options(self, request):
+        """ Compose the response to an OPTIONS request from the route table.
+
+        :return bytes: response, or None if no route serves the requested path
+        """
+        cached = self._options_cache.get(request.path)
+        if cached is None:
+            methods = set(method for method, path in self._routes if path == request.path or request.path == "*")
+            if not methods:
+                return None
+            if "GET" in methods:
+                methods.add("HEAD")  # answered by the GET handler
+            methods.add("OPTIONS")
+            methods = ", ".join(sorted(methods))
+            preflight = None
+            if self.cors is not None:
+                preflight = self.cors.preflight(methods) + b"Connection: close\r\n\r\n"
+            cached = (f"HTTP/1.1 204 No Content\r\nAllow: {methods}\r\nConnection: close\r\n\r\n".encode("utf-8"), preflight)
+            self._options_cache[request.path] = cached
+
+        response, preflight = cached
+        origin = request.header.get(b"Origin")
+        if preflight is not None and origin is not None and b"Access-Control-Request-Method" in request.header:
+            allow = self.cors.header(origin)
+            if allow is not None:
+                return b"HTTP/1.1 204 No Content\r\n" + allow + preflight
+        return response
+
     def start(self):
         server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -72,12 +128,27 @@ class HTTPServer:
         server.bind((self.host, self.port))
         server.listen(self.backlog)
 
-        print(f"HTTP server started on {self.host}:{self.port}")
+        print(f"HTTP{'S' if self.tls else ''} server started on {self.host}:{self.port}")
 
         while True:
+            admitted = False  # by gcscheduler
+            request = None
             try:
                 conn, addr = server.accept()
                 conn.settimeout(self.timeout)
+                if _NODELAY:  # send small responses at once, buffering is done by BufferedConnection
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+                if self.tls is not None:
+                    sock = self.tls.wrap(conn)
+                    if sock is None:  # handshake failed
+                        conn.close()
+                        continue
+                    conn = sock
+
+                profile = None
+                if self.profiler is not None:
+                    profile = self.profiler.begin()
 
                 request_line = conn.readline()
                 if request_line is None:
@@ -90,22 +161,31 @@ class HTTPServer:
 
                 print(f"request line {request_line} from {addr[0]}")
 
+                if self.gcscheduler is not None:
+                    self.gcscheduler.admit()
+                    admitted = True
+
                 try:
-                    request = HTTPRequest(request_line)
+                    request = self._pool.acquire(request_line)
                 except InvalidRequest as e:
-                    while True:
-                        # read and discard header fields
-                        line = conn.readline()
-                        if line is None:
-                            raise OSError(errno.ETIMEDOUT)
-                        if line in [b"", b"\r\n"]:
-                            break
+                    self._discard_header(conn)
                     response = HTTPResponse(400, "text/plain", close=True)
                     response.send(conn)
                     conn.write(repr(e).encode("utf-8"))
                     conn.close()
                     continue
 
+                if self.ratelimiter is not None:
+                    response = self.ratelimiter.allow(addr[0], request.path)
+                    if response is not None:  # too many requests
+                        self._discard_header(conn)
+                        conn.write(response)
+                        conn.close()
+                        continue
+
+                if profile is not None:
+                    self.profiler.mark(profile)
+
                 while True:
                     # read header fields and add name / value to dict 'header'
                     line = conn.readline()
@@ -119,16 +199,48 @@ class HTTPServer:
                             name, value = line.split(b':', 1)
                             request.header[name] = value.strip()
 
+                if profile is not None:
+                    self.profiler.mark(profile)
+
                 # search function which is connected to (method, path)
                 func = self._routes.get((request.method, request.path))
+                body = True
+                if func is None:
+                    if request.method == "HEAD":  # use the GET handler but send no body
+                        func = self._routes.get(("GET", request.path))
+                        body = False
+                    elif request.method == "OPTIONS":
+                        response = self._options(request)
+                        if response is not None:
+                            conn.write(response)
+                            conn.close()
+                            continue
+
+                if profile is not None:
+                    self.profiler.mark(profile)
+
                 if func:
-                    if func(conn, request) != CONNECTION_KEEP_ALIVE:
+                    header = None
+                    if self.cors is not None and b"Origin" in request.header:
+                        header = self.cors.header(request.header[b"Origin"])
+                    conn = BufferedConnection(conn, self._buffer)
+                    if header is not None or not body:
+                        conn = ResponseFilter(conn, header, body)
+                    result = func(conn, request)
+                    if profile is not None:
+                        self.profiler.end(profile, request)
+                    if result != CONNECTION_KEEP_ALIVE:
                         # close connection unless explicitly kept alive
                         conn.close()
+                    else:  # handler may still use the request and the connection
+                        request = None
+                        conn.detach()
                 else:  # no function found for (method, path) combination
                     response = HTTPResponse(404)
                     response.send(conn)
                     conn.close()
+                    if profile is not None:
+                        self.profiler.end(profile, request, found=False)
 
             except KeyboardInterrupt:  # will stop the server
                 conn.close()
@@ -142,6 +254,11 @@ class HTTPServer:
                 else:
                     server.close()
                     raise e
+            finally:
+                if admitted:  # connection is done, a good moment to collect garbage
+                    self.gcscheduler.release()
+                if request is not None:
+                    self._pool.release(request)
 
         server.close()
         print("HTTP server stopped")
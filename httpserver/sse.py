@@ -45,11 +45,14 @@ class EventSource:
         :param str event: optional event type, used for dispatching at client
         :param int retry: retry interval in milliseconds
         """
-        writer = self.conn
+        lines = []
         if id is not None:
-            writer.write(f"id: {id}\n")
+            lines.append(f"id: {id}\n")
         if event is not None:
-            writer.write(f"event: {event}\n")
+            lines.append(f"event: {event}\n")
         if retry is not None:
-            writer.write(f"retry: {retry}\n")
-        writer.write(f"data: {data}\n\n")
+            lines.append(f"retry: {retry}\n")
+        lines.append(f"data: {data}\n\n")
+        self.conn.write("".join(lines))
+        if hasattr(self.conn, "flush"):  # BufferedConnection
+            self.conn.flush()
@@ -0,0 +1,18 @@
+# Millisecond tick counter
+#
+# MicroPython offers time.ticks_ms() and time.ticks_diff(), CPython does not.
+# Import them from here so the same code runs on both.
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+try:
+    from time import ticks_diff, ticks_ms
+except ImportError:  # CPython
+    from time import monotonic_ns
+
+    def ticks_ms():
+        return monotonic_ns() // 1000000
+
+    def ticks_diff(ticks1, ticks2):
+        return ticks1 - ticks2
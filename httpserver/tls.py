@@ -0,0 +1,95 @@
+# TLS (HTTPS) support
+#
+# Usage:
+#
+#   from httpserver import HTTPServer
+#   from httpserver.tls import TLS
+#
+#   app = HTTPServer(port=443, tls=TLS("cert.pem", "key.pem"))
+#
+# A self-signed certificate for testing can be created with:
+#
+#   openssl req -x509 -newkey rsa:2048 -nodes -days 365 -subj "/CN=localhost" \
+#       -keyout key.pem -out cert.pem
+#
+# A full handshake is expensive, on an ESP32 it takes seconds. To limit the
+# number of handshakes:
+# - All connections share one SSL context, so its session cache and session
+#   tickets let returning clients resume a previous session (where the ssl
+#   module supports it, MicroPython's mbedtls server does not resume sessions).
+# - Handlers which return CONNECTION_KEEP_ALIVE keep the connection, and thus
+#   the TLS session, open.
+# Handshake counts and durations are available via stats().
+#
+# Copyright 2026 (c) Erik de Lange
+# Released under MIT license
+
+try:
+    import ssl
+except ImportError:
+    import ussl as ssl
+
+from .ticks import ticks_diff, ticks_ms
+
+
+class TLS:
+
+    def __init__(self, certfile, keyfile, session_cache=True):
+        """ Create the SSL context shared by all connections
+
+        :param str certfile: name of file with the server certificate (chain)
+        :param str keyfile: name of file with the private key
+        :param bool session_cache: if true allow clients to resume sessions
+        """
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.context = None
+        if hasattr(ssl, "SSLContext"):
+            self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self.context.load_cert_chain(certfile, keyfile)
+            if not session_cache:
+                if hasattr(ssl, "OP_NO_TICKET"):
+                    self.context.options |= ssl.OP_NO_TICKET
+                if hasattr(self.context, "num_tickets"):
+                    self.context.num_tickets = 0
+        self.handshakes = 0
+        self.resumed = 0
+        self.failed = 0
+        self._handshake_ms = 0  # total
+        self._max_handshake_ms = 0
+
+    def wrap(self, sock):
+        """ Wrap a newly accepted socket and do the handshake
+
+        :return: the wrapped socket, or None if the handshake failed
+        """
+        start = ticks_ms()
+        try:
+            if self.context is not None:
+                sock = self.context.wrap_socket(sock, server_side=True)
+            else:  # older ports like Pycom only have ssl.wrap_socket()
+                sock = ssl.wrap_socket(sock, server_side=True, keyfile=self.keyfile, certfile=self.certfile)
+        except OSError:
+            self.failed += 1
+            return None
+
+        ms = ticks_diff(ticks_ms(), start)
+        self.handshakes += 1
+        if getattr(sock, "session_reused", False):
+            self.resumed += 1
+        self._handshake_ms += ms
+        if ms > self._max_handshake_ms:
+            self._max_handshake_ms = ms
+        return sock
+
+    def stats(self):
+        stats = {
+            "handshakes": self.handshakes,
+            "resumed": self.resumed,
+            "failed": self.failed,
+            "avg_handshake_ms": self._handshake_ms // self.handshakes if self.handshakes else 0,
+            "max_handshake_ms": self._max_handshake_ms
+        }
+        if hasattr(self.context, "session_stats"):  # CPython
+            stats["session_cache"] = self.context.session_stats()
+        return stats
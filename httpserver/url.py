@@ -27,12 +27,20 @@ class InvalidRequest(Exception):
     pass
 
 
+# Method names and versions are taken from a table so every request shares the
+# same (interned) str objects, and an unknown method is rejected by a lookup.
+_METHODS = {m.encode(): m for m in ("GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE")}
+_VERSIONS = {b"HTTP/1.0": "1.0", b"HTTP/1.1": "1.1"}
+
+
 class HTTPRequest:
 
-    def __init__(self, request_line) -> None:
+    __slots__ = ("method", "url", "version", "path", "query", "parameters", "header")
+
+    def __init__(self, request_line=None) -> None:
         """ Separate an HTTP request line in its elements.
 
-            :param bytes request_line: the complete HTTP request line
+            :param bytes request_line: the complete HTTP request line, or None to create an empty request for a pool
             :return Request: instance containing
                     method      the request method ("GET", "PUT", ...)
                     url         the request URL, including the query string (if any)
@@ -41,43 +49,97 @@ class HTTPRequest:
                     version     the HTTP version
                     parameters  dictionary with key-value pairs from the query string
                     header      empty dict, placeholder for key-value pairs from request header fields
+            :raises InvalidRequest: see parse()
+        """
+        self.parameters = dict()
+        self.header = dict()
+        if request_line is not None:
+            self.parse(request_line)
+
+    def parse(self, request_line):
+        """ (Re)fill the request from a request line, reusing the parameters and header dicts.
+
+            :param bytes request_line: the complete HTTP request line
             :raises InvalidRequest: if line does not contain exactly 3 components separated by spaces
                                     if method is not in IETF standardized set
                                     aside from these no other checks done here
         """
-        try:
-            self.method, self.url, self.version = request_line.decode("utf-8").split()
-            # note that method, url and version are str, not bytes
-        except ValueError:
+        elements = request_line.split()
+        if len(elements) != 3:
             raise InvalidRequest(f"Expected 3 elements in {request_line}")
+        method, url, version = elements
 
-        if self.version.find("/") != -1:
-            self.version = self.version.split("/", 1)[1]
+        self.method = _METHODS.get(method)
+        if self.method is None:
+            raise InvalidRequest(f"Invalid method {method} in {request_line}")
 
-        if self.method not in ["GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE"]:
-            raise InvalidRequest(f"Invalid method {self.method} in {request_line}")
+        try:
+            # note that method, url and version are str, not bytes
+            self.url = url.decode("utf-8")
+            self.version = _VERSIONS.get(version)
+            if self.version is None:
+                self.version = version.decode("utf-8")
+                if self.version.find("/") != -1:
+                    self.version = self.version.split("/", 1)[1]
+        except ValueError:
+            raise InvalidRequest(f"Invalid encoding in {request_line}")
 
+        self.parameters.clear()
         if self.url.find("?") != -1:
             self.path, self.query = self.url.split("?", 1)
-            self.parameters = query(self.query)
+            query(self.query, self.parameters)
         else:
             self.path = self.url
             self.query = ""
-            self.parameters = dict()
 
-        self.header = dict()
+        self.header.clear()
 
 
-def query(query):
+class RequestPool:
+    """ Keep request objects for reuse, so handling a request allocates less """
+
+    def __init__(self, size=4):
+        """ :param int size: maximum number of request objects kept """
+        self.size = size
+        self.created = 0
+        self.reused = 0
+        self._free = []
+
+    def acquire(self, request_line, request=None):
+        """ Return a request filled from request_line
+
+            :param bytes request_line: the complete HTTP request line
+            :param HTTPRequest request: object to refill, else one is taken from the pool
+            :raises InvalidRequest: see HTTPRequest.parse()
+        """
+        if request is None:
+            if self._free:
+                request = self._free.pop()
+                self.reused += 1
+            else:
+                request = HTTPRequest()
+                self.created += 1
+        request.parse(request_line)
+        return request
+
+    def release(self, request):
+        """ Return a request to the pool. It must no longer be used by the caller. """
+        if len(self._free) < self.size:
+            self._free.append(request)
+
+
+def query(query, d=None):
     """ Place all key-value pairs from a request URLs query string into a dict.
 
     Example: request b"GET /page?key1=0.07&key2=0.03&key3=0.13 HTTP/1.1\r\n"
     yields dictionary {'key1': '0.07', 'key2': '0.03', 'key3': '0.13'}.
 
     :param str query: the query part (everything after the '?') from an HTTP request line
+    :param dict d: dictionary to add the pairs to, default a new one
     :return dict: dictionary with zero or more entries
     """
-    d = dict()
+    if d is None:
+        d = dict()
     if len(query) > 0:
         for pair in query.split("&"):
             try: